@@ -0,0 +1,160 @@
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import tempfile
+import time
+import pandas as pd # type: ignore
+from benchmarks.synthetic import SYNTHETIC_MAPPING, synthetic_contacts, synthetic_phones
+from contact_cache import ContactCache
+from database import open_connection
+from importer import bulk_import
+from phone_numbers import normalize_phone_series, process_phone_number
+from queries import build_filter_query
+
+##############################################################################
+# Contacts pipeline benchmarks. Run from the "google contacts" directory:
+#   python -m benchmarks.run --rows 200000 --output bench.json [--compare old.json]
+##############################################################################
+FILTER_CASES = {
+    "equals": [
+        {"column": "data_source", "condition": "equals", "value": "vendor-a"},
+    ],
+    "not_empty": [
+        {"column": "email", "condition": "not_empty"},
+    ],
+    "and": [
+        {"column": "country", "condition": "equals", "value": "Turkey"},
+        {"column": "data_source", "condition": "equals", "value": "website", "operator": "AND"},
+    ],
+    "or": [
+        {"column": "country", "condition": "equals", "value": "Russia"},
+        {"column": "country", "condition": "equals", "value": "Kazakhstan", "operator": "OR"},
+    ],
+    "and_not_empty": [
+        {"column": "tags", "condition": "equals", "value": "vip"},
+        {"column": "email", "condition": "not_empty", "operator": "AND"},
+    ],
+    "has_tag": [
+        {"column": "tags", "condition": "has_tag", "value": "vip"},
+    ],
+    "has_any_tags": [
+        {"column": "tags", "condition": "has_any_tags", "value": "partner, cold"},
+    ],
+    "similar": [
+        {"column": "full_name", "condition": "similar", "value": "Mehmed Yilmas"},
+    ],
+    "country_code": [
+        {"column": "country_code", "condition": "equals", "value": "TR"},
+    ],
+    "phone_prefix": [
+        {"column": "phone", "condition": "phone_prefix", "value": "+90532"},
+    ],
+}
+
+def timed(func, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+def bench_normalization(rows, seed):
+    phones = synthetic_phones(rows, seed)
+    series = pd.Series(phones)
+    scalar = timed(lambda: [process_phone_number(phone) for phone in phones], repeat=3)
+    vector = timed(lambda: normalize_phone_series(series), repeat=3)
+    return {
+        "rows": rows,
+        "scalar_per_sec": rows / scalar,
+        "series_per_sec": rows / vector,
+    }
+
+def bench_import(data, db_dir):
+    results = {}
+    for mode in ("append", "upsert"):
+        db_path = os.path.join(db_dir, f"import_{mode}.db")
+        stats = bulk_import(data, SYNTHETIC_MAPPING, db_path=db_path, mode=mode)
+        results[mode] = {key: stats[key] for key in ("rows", "seconds", "rows_per_sec",
+                                                     "inserted", "updated", "skipped")}
+    return results
+
+def bench_filters(db_path, page_size=20):
+    conn = open_connection(db_path, readonly=True)
+    results = {}
+    try:
+        cache = ContactCache()
+        load_ms = timed(lambda: cache.load(conn), repeat=1) * 1000
+        results["memory_cache"] = {"load_ms": load_ms, "megabytes": cache.memory_bytes() / (1024 * 1024)}
+        for name, filters in FILTER_CASES.items():
+            query, params = build_filter_query(filters)
+            # What the filter screen runs: a COUNT(*) plus the first page.
+            count = conn.execute(f"SELECT COUNT(*) FROM ({query})", params).fetchone()[0]
+            count_ms = timed(lambda: conn.execute(f"SELECT COUNT(*) FROM ({query})", params).fetchone()) * 1000
+            page_ms = timed(lambda: conn.execute(f"SELECT * FROM ({query}) ORDER BY id LIMIT ?",
+                                                 params + [page_size]).fetchall()) * 1000
+            # The same filter as in-memory masks over the cache.
+            cache_ms = timed(lambda: cache.filter(filters, conn)) * 1000
+            results[name] = {"matches": count, "count_ms": count_ms, "first_page_ms": page_ms,
+                             "cache_ms": cache_ms}
+    finally:
+        conn.close()
+    return results
+
+def run(rows, seed=0):
+    data = synthetic_contacts(rows, seed)
+    with tempfile.TemporaryDirectory() as db_dir:
+        imports = bench_import(data, db_dir)
+        filters = bench_filters(os.path.join(db_dir, "import_append.db"))
+    return {
+        "meta": {
+            "rows": rows,
+            "seed": seed,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "pandas": pd.__version__,
+        },
+        "normalization": bench_normalization(rows, seed),
+        "import": imports,
+        "filters": filters,
+    }
+
+def flatten(results, prefix=""):
+    flat = {}
+    for key, value in results.items():
+        if key == "meta":
+            continue
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, float):
+            flat[prefix + key] = value
+    return flat
+
+def compare(current, previous):
+    # Ratio > 1 means faster for throughput metrics and slower for latency metrics.
+    old = flatten(previous)
+    for key, value in flatten(current).items():
+        if key in old and old[key]:
+            print(f"{key:40s} {old[key]:14.2f} -> {value:14.2f}  ({value / old[key]:.2f}x)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the contacts pipeline.")
+    parser.add_argument("--rows", type=int, default=100000, help="synthetic contacts to generate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_results.json", help="JSON file for the results")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    args = parser.parse_args(argv)
+    results = run(args.rows, args.seed)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import random
+import pandas as pd # type: ignore
+from phone_numbers import PHONE_RULES
+
+FIRST_NAMES = ["Ahmet", "Mehmet", "Ayşe", "Fatma", "Ivan", "Olga", "Dmitry", "Anna", "John", "Maria",
+               "Aigerim", "Nurlan", "Hans", "Sofia", "Luca", "Chen", "Kim", "Pierre"]
+LAST_NAMES = ["Yılmaz", "Kaya", "Demir", "Ivanov", "Petrova", "Smirnov", "Smith", "Müller", "Rossi",
+              "Garcia", "Nazarbayev", "Wang", "Park", "Dubois", "Öztürk"]
+DOMAINS = ["gmail.com", "yandex.ru", "mail.ru", "hotmail.com", "outlook.com", "example.com.tr"]
+SOURCES = ["website", "expo-2024", "vendor-a", "vendor-b", "referral", "instagram"]
+TAGS = ["vip", "lead", "customer", "newsletter", "cold", "partner"]
+PHONE_FORMATS = ["{}", "+{}", "{} ", "({}) ", "{}-"]
+
+##############################################################################
+# Synthetic contact files for benchmarks
+##############################################################################
+def rule_number(rng, rule):
+    # A raw number that phone_numbers.py resolves through this rule.
+    length, prefix = rule[0], rule[1]
+    digits = prefix + "".join(rng.choice("0123456789") for _ in range(length - len(prefix)))
+    return rng.choice(PHONE_FORMATS).format(digits)
+
+def fallback_number(rng):
+    # Numbers outside the rule table: "+" unknown, N/A and empty branches.
+    kind = rng.random()
+    if kind < 0.4:
+        return "+" + "".join(rng.choice("0123456789") for _ in range(rng.randint(6, 9)))
+    if kind < 0.8:
+        return "".join(rng.choice("0123456789") for _ in range(rng.randint(3, 7)))
+    return ""
+
+def synthetic_phones(rows, seed=0, fallback_share=0.1):
+    rng = random.Random(seed)
+    phones = []
+    for i in range(rows):
+        if i < len(PHONE_RULES):
+            phones.append(rule_number(rng, PHONE_RULES[i]))  # every branch at least once
+        elif rng.random() < fallback_share:
+            phones.append(fallback_number(rng))
+        else:
+            phones.append(rule_number(rng, rng.choice(PHONE_RULES)))
+    return phones
+
+def synthetic_email(rng, first, last, i):
+    kind = rng.random()
+    if kind < 0.7:
+        return f"{first}.{last}{i}@{rng.choice(DOMAINS)}".lower()
+    if kind < 0.8:
+        return f"  {first.upper()}{i}@{rng.choice(DOMAINS).upper()} "
+    if kind < 0.9:
+        return "n/a"
+    return ""
+
+def synthetic_contacts(rows, seed=0, duplicate_share=0.05):
+    rng = random.Random(seed)
+    phones = synthetic_phones(rows, seed)
+    records = []
+    for i in range(rows):
+        if records and rng.random() < duplicate_share:
+            # Re-list an earlier contact from another source, as vendor lists do.
+            record = dict(rng.choice(records))
+            record["source"] = rng.choice(SOURCES)
+            records.append(record)
+            continue
+        first = rng.choice(FIRST_NAMES)
+        last = rng.choice(LAST_NAMES)
+        records.append({
+            "first_name": first,
+            "last_name": last,
+            "phone": phones[i],
+            "email": synthetic_email(rng, first, last, i),
+            "source": rng.choice(SOURCES),
+            "tags": ", ".join(rng.sample(TAGS, rng.randint(0, 3))),
+        })
+    return pd.DataFrame(records)
+
+# Column mapping for synthetic_contacts frames (same shape as a saved mapping).
+SYNTHETIC_MAPPING = {
+    "full_name": ["first_name", "last_name"],
+    "phone": "phone",
+    "email": "email",
+    "data_source": "source",
+    "fixed_data_source": "",
+    "tags": "tags",
+    "fixed_tags": "",
+}
+
+def write_synthetic_file(file_path, rows, seed=0):
+    data = synthetic_contacts(rows, seed)
+    if file_path.endswith(".csv"):
+        data.to_csv(file_path, index=False)
+    else:
+        data.to_excel(file_path, index=False)
+    return file_path
@@ -0,0 +1,183 @@
+import string
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+from database import E164_COLUMNS, FACET_COLUMNS, similar_names, similar_names_query, split_tokens, table_version
+from queries import CONTACT_FIELDS, phone_prefix_ranges
+
+# Columns held in memory: what the grid shows plus the integer phone parts.
+CACHE_COLUMNS = list(dict.fromkeys(CONTACT_FIELDS + E164_COLUMNS))
+
+# SQLite's NOCASE collation only folds ASCII letters.
+NOCASE = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+##############################################################################
+# ContactCache: contacts held as pandas columns for the filter screen's
+# in-memory mode. Filters from queries.build_filter_query become boolean
+# masks with the same meaning; the copy is reloaded when table_versions
+# shows contacts changed since it was read.
+##############################################################################
+def text_not_empty(values):
+    return (values.notna() & ~values.astype(str).str.lower().isin(["", "n/a", "nan"])).to_numpy()
+
+def by_category(series, test):
+    # Evaluate test once per distinct value of a categorical column, then look
+    # the answer up by code (-1, a missing value, picks the trailing False).
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        hits = test(pd.Series(series.cat.categories, dtype=object))
+        return np.append(hits, False)[series.cat.codes.to_numpy()]
+    return test(series)
+
+def combine(masks):
+    # [(operator, mask)] with AND binding tighter than OR, as in SQL.
+    result = None
+    term = None
+    for operator, mask in masks:
+        if term is None:
+            term = mask
+        elif operator == "OR":
+            result = term if result is None else result | term
+            term = mask
+        else:
+            term = term & mask
+    if term is None:
+        return None
+    return term if result is None else result | term
+
+class ContactCache:
+    def __init__(self):
+        self.frame = None
+        self.version = None
+        self.tag_rows = {}
+        self.not_empty = {}
+
+    def is_stale(self, conn):
+        return self.frame is None or table_version(conn) != self.version
+
+    def load(self, conn):
+        # One read transaction, so the rows and the version agree.
+        conn.execute("BEGIN")
+        try:
+            version = table_version(conn)
+            rows = conn.execute(f"SELECT {', '.join(CACHE_COLUMNS)} FROM contacts ORDER BY id").fetchall()
+            tags = conn.execute("""
+                SELECT t.name, ct.contact_id FROM contact_tags ct JOIN tags t ON t.id = ct.tag_id
+                ORDER BY t.name, ct.contact_id
+            """).fetchall()
+        finally:
+            conn.execute("COMMIT")
+        frame = pd.DataFrame(rows, columns=CACHE_COLUMNS)
+        frame["id"] = frame["id"].astype("int64")
+        for col in FACET_COLUMNS:
+            frame[col] = frame[col].astype("category")
+        # Plain int64 arrays for fast range tests; -1 stands for no E.164 number.
+        for col in ["dial_code", "national_number"]:
+            frame[col] = frame[col].fillna(-1).astype("int64")
+        ids = frame["id"].to_numpy()
+        # Tag name -> row positions, found by binary search on the sorted ids.
+        tag_rows = {}
+        if tags:
+            names = pd.Series([name.translate(NOCASE) for name, _ in tags])
+            positions = np.searchsorted(ids, np.array([contact_id for _, contact_id in tags], dtype="int64"))
+            for name, group in pd.Series(positions).groupby(names.to_numpy()):
+                tag_rows[name] = group.to_numpy()
+        self.frame = frame
+        self.version = version
+        self.tag_rows = tag_rows
+        self.not_empty = {}
+
+    def clear(self):
+        self.frame = None
+        self.version = None
+        self.tag_rows = {}
+        self.not_empty = {}
+
+    def memory_bytes(self):
+        if self.frame is None:
+            return 0
+        arrays = list(self.tag_rows.values()) + list(self.not_empty.values())
+        return int(self.frame.memory_usage(deep=True).sum()) + sum(array.nbytes for array in arrays)
+
+    def tag_mask(self, names):
+        mask = np.zeros(len(self.frame), dtype=bool)
+        for name in names:
+            rows = self.tag_rows.get(name.translate(NOCASE))
+            if rows is not None:
+                mask[rows] = True
+        return mask
+
+    def mask(self, spec, conn, scores=None):
+        # Boolean mask for one filter, or None when it has no value yet
+        # (the same filters queries.build_filter_query skips). similar filters
+        # raise each row's entry in scores to its best similarity.
+        frame = self.frame
+        col = spec["column"]
+        cond = spec["condition"]
+        val = spec.get("value", "")
+        if cond == "equals":
+            if val == "":
+                return None
+            if col == "id":
+                if not val.strip().isdigit():
+                    return np.zeros(len(frame), dtype=bool)
+                return (frame["id"] == int(val)).to_numpy()
+            return by_category(frame[col], lambda values: (values == val).to_numpy(dtype=bool))
+        if cond == "not_empty":
+            # Same answer until the next reload, so it is kept per column.
+            if col not in self.not_empty:
+                self.not_empty[col] = by_category(frame[col], text_not_empty)
+            return self.not_empty[col]
+        if cond == "contains":
+            val = val.strip()
+            if val == "":
+                return None
+            return by_category(frame[col], lambda values: values.astype(str).str.contains(
+                val, case=False, regex=False).to_numpy(dtype=bool) & values.notna().to_numpy())
+        if cond == "has_tag":
+            return self.tag_mask([val]) if val != "" else None
+        if cond == "has_any_tags":
+            names = split_tokens(val)
+            return self.tag_mask(names) if names else None
+        if cond == "similar":
+            if similar_names_query(val) is None:
+                return None
+            # Ranking needs the trigram index; only the matching ids come back from SQLite.
+            matches = similar_names(conn, val)
+            ids = np.array([row[0] for row in matches], dtype="int64")
+            frame_ids = frame["id"].to_numpy()
+            mask = np.isin(frame_ids, ids)
+            if scores is not None and matches and len(frame_ids):
+                # Ids are sorted, so each match's row is found by binary search.
+                rows = np.searchsorted(frame_ids, ids).clip(0, len(frame_ids) - 1)
+                found = frame_ids[rows] == ids
+                np.maximum.at(scores, rows[found], np.array([row[2] for row in matches])[found])
+            return mask
+        if cond == "phone_prefix":
+            prefix = phone_prefix_ranges(val)
+            if prefix is None:
+                return None
+            codes, ranges = prefix
+            mask = np.isin(frame["dial_code"].to_numpy(), codes)
+            if ranges:
+                national = frame["national_number"].to_numpy()
+                hit = np.zeros(len(frame), dtype=bool)
+                for low, high in ranges:
+                    hit |= (national >= low) & (national <= high)
+                mask &= hit
+            return mask
+        return None
+
+    def filter(self, filters, conn):
+        # Row positions of the matching contacts, best similar-name match first,
+        # then in id order. Positions rather than a copied frame, so refining a
+        # filter only costs the masks.
+        masks = []
+        scores = np.zeros(len(self.frame))
+        for spec in filters:
+            mask = self.mask(spec, conn, scores)
+            if mask is not None:
+                masks.append((spec.get("operator") or "AND", mask))
+        combined = combine(masks)
+        if combined is None:
+            return np.arange(len(self.frame))
+        positions = np.flatnonzero(combined)
+        return positions[np.argsort(-scores[positions], kind="stable")]
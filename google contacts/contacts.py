@@ -1,8 +1,7 @@
-from phone_numbers import process_phone_number
+from importer import import_file, read_preview, write_mapping
 import tkinter as tk
+import threading
 from tkinter import filedialog, messagebox
-import pandas as pd
-import sqlite3
 from translations import translations
 from utility import center_window
 
@@ -14,14 +13,21 @@ class ContactsFrame(tk.Frame):
         tk.Frame.__init__(self, master)
         self.controller = controller
         self.data = None
+        self.file_path = None
+        self.importing = False
         self.columns = []
         self.load_button = tk.Button(self, command=self.load_file)
         self.load_button.pack(pady=10)
         self.mapping_frame = tk.Frame(self)
         self.mapping_frame.pack(pady=10)
         self.mappings = {}
+        self.merge_duplicates = tk.BooleanVar(value=False)
+        self.merge_check = tk.Checkbutton(self, variable=self.merge_duplicates)
+        self.merge_check.pack()
         self.save_button = tk.Button(self, command=self.save_to_db, state=tk.DISABLED)
         self.save_button.pack(pady=10)
+        self.save_mapping_button = tk.Button(self, command=self.save_mapping, state=tk.DISABLED)
+        self.save_mapping_button.pack(pady=10)
         self.clear_button = tk.Button(self, command=self.clear_data, state=tk.DISABLED)
         self.clear_button.pack(pady=10)
         self.back_button = tk.Button(self, command=lambda: self.controller.show_frame("MainMenuFrame"))
@@ -31,6 +37,8 @@ class ContactsFrame(tk.Frame):
         t = translations[self.controller.lang]
         self.load_button.config(text=t["upload_file"])
         self.save_button.config(text=t["save_db"])
+        self.save_mapping_button.config(text=t["save_mapping"])
+        self.merge_check.config(text=t["merge_duplicates"])
         self.clear_button.config(text=t["clear_data"])
         self.back_button.config(text=t["back_main"])
         # Update mapping labels inside mapping_frame:
@@ -70,7 +78,9 @@ class ContactsFrame(tk.Frame):
         tk.Label(self.mapping_frame, text=t["or_fixed"]).grid(row=5, column=2, sticky="w")
         self.fixed_tags = tk.Entry(self.mapping_frame)
         self.fixed_tags.grid(row=5, column=3, padx=5, pady=5)
-        self.save_button.config(state=tk.NORMAL)
+        if not self.importing:
+            self.save_button.config(state=tk.NORMAL)
+        self.save_mapping_button.config(state=tk.NORMAL)
 
     def load_file(self):
         t = translations[self.controller.lang]
@@ -81,10 +91,9 @@ class ContactsFrame(tk.Frame):
         if not file_path:
             return
         try:
-            if file_path.endswith('.csv'):
-                self.data = pd.read_csv(file_path)
-            else:
-                self.data = pd.read_excel(file_path)
+            # Only a preview is kept; the import streams the file itself.
+            self.data = read_preview(file_path)
+            self.file_path = file_path
             self.columns = list(self.data.columns)
             messagebox.showinfo(t["success"], f"{t['file_load_success']}: {', '.join(self.columns)}")
             self.create_mapping_widgets()
@@ -96,67 +105,75 @@ class ContactsFrame(tk.Frame):
     def create_mapping_widgets(self):
         self.update_texts()
 
+    def get_mapping(self):
+        def selected(var):
+            col = var.get()
+            return col if col != "None" else None
+        return {
+            "full_name": [selected(var) for var in self.mappings['full_name'] if selected(var)],
+            "phone": selected(self.mappings['phone']),
+            "email": selected(self.mappings['email']),
+            "data_source": selected(self.mappings['data_source']),
+            "fixed_data_source": self.fixed_data_source.get(),
+            "tags": selected(self.mappings['tags']),
+            "fixed_tags": self.fixed_tags.get(),
+        }
+
+    def save_mapping(self):
+        # Saved mappings are reused by the headless import (import_cli.py).
+        t = translations[self.controller.lang]
+        file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON Files", "*.json")])
+        if not file_path:
+            return
+        try:
+            write_mapping(self.get_mapping(), file_path)
+            messagebox.showinfo(t["success"], f"{t['mapping_saved']} {file_path}")
+        except Exception as e:
+            messagebox.showerror(t["error"], f"{t['mapping_save_fail']}: {e}")
+
     def save_to_db(self):
+        # The import runs on a worker thread with its own connection; the Tk thread polls.
+        mode = "upsert" if self.merge_duplicates.get() else "append"
+        mapping = self.get_mapping()
+        job = {"done": False, "error": None, "stats": None}
+        def run():
+            try:
+                job["stats"] = import_file(self.file_path, mapping, db_path=self.controller.db.db_path, mode=mode)
+            except Exception as e:
+                job["error"] = e
+            job["done"] = True
+        self.set_import_state(tk.DISABLED)
+        threading.Thread(target=run, daemon=True).start()
+        self.after(100, lambda: self.finish_import(job))
+
+    def finish_import(self, job):
+        if not job["done"]:
+            self.after(100, lambda: self.finish_import(job))
+            return
         t = translations[self.controller.lang]
-        conn = sqlite3.connect("contacts.db")
-        cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS contacts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                full_name TEXT,
-                phone TEXT,
-                email TEXT,
-                data_source TEXT,
-                tags TEXT,
-                country TEXT
-            )
-        """)
-        for index, row in self.data.iterrows():
-            full_name_parts = []
-            for var in self.mappings['full_name']:
-                col = var.get()
-                if col != "None":
-                    full_name_parts.append(str(row[col]))
-            full_name = " ".join(full_name_parts) if full_name_parts else ""
-            phone_col = self.mappings['phone'].get()
-            if phone_col != "None":
-                phone_raw = str(row[phone_col]).strip()
-                if phone_raw:
-                    phone_info = process_phone_number(phone_raw)
-                    phone_cleaned = phone_info["cleaned"]
-                    country = phone_info["country"]
-                else:
-                    phone_cleaned = ""
-                    country = ""
-            else:
-                phone_cleaned = ""
-                country = ""
-            email_col = self.mappings['email'].get()
-            email = str(row[email_col]) if email_col != "None" else ""
-            data_source_col = self.mappings['data_source'].get()
-            if data_source_col != "None":
-                data_source = str(row[data_source_col])
-            else:
-                data_source = self.fixed_data_source.get().strip()
-            tags_col = self.mappings['tags'].get()
-            if tags_col != "None":
-                tags = str(row[tags_col])
-            else:
-                tags = self.fixed_tags.get().strip()
-            cursor.execute("""
-                INSERT INTO contacts (full_name, phone, email, data_source, tags, country)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (full_name, phone_cleaned, email, data_source, tags, country))
-        conn.commit()
-        conn.close()
-        messagebox.showinfo(t["success"], t["data_saved_db"])
+        self.set_import_state(tk.NORMAL)
+        if job["error"] is not None:
+            messagebox.showerror(t["error"], f"{t['import_fail']}: {job['error']}")
+            return
+        stats = job["stats"]
+        messagebox.showinfo(t["success"], f"{t['data_saved_db']}\n" +
+                            t["import_stats"].format(rows=stats["rows"], rate=stats["rows_per_sec"]) + "\n" +
+                            t["upsert_stats"].format(**stats))
+
+    def set_import_state(self, state):
+        # The file and mapping stay fixed while an import is running.
+        self.importing = state == tk.DISABLED
+        for button in (self.save_button, self.load_button, self.clear_button):
+            button.config(state=state)
 
     def clear_data(self):
         t = translations[self.controller.lang]
         self.data = None
+        self.file_path = None
         self.columns = []
         for widget in self.mapping_frame.winfo_children():
             widget.destroy()
         self.save_button.config(state=tk.DISABLED)
+        self.save_mapping_button.config(state=tk.DISABLED)
         self.clear_button.config(state=tk.DISABLED)
         messagebox.showinfo(t["cleared"], t["data_cleared"])
@@ -0,0 +1,473 @@
+import math
+import sqlite3
+from fuzzy import fold_name, folded_trigrams, name_trigrams
+from phone_numbers import e164_parts
+
+DB_NAME = "contacts.db"
+
+# Prepared statements kept per connection by the sqlite3 module.
+STATEMENT_CACHE = 256
+
+CONNECTION_PRAGMAS = [
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA temp_store=MEMORY",
+]
+
+# Columns FilterFrame filters on with "col = ?" / not-empty predicates.
+INDEXED_COLUMNS = ["phone", "email", "country", "data_source", "tags"]
+
+# Columns mirrored into the contacts_fts full-text table.
+FTS_COLUMNS = ["full_name", "email"]
+
+# Low-cardinality columns whose distinct values and counts live in contact_facets.
+FACET_COLUMNS = ["country", "data_source", "tags", "country_code"]
+
+# Normalized phones split into integers: dial code, national number, plus the ISO country.
+E164_COLUMNS = ["dial_code", "national_number", "country_code"]
+
+# How many values a filter dropdown shows at once.
+FACET_LIMIT = 50
+
+# Tokens treated as missing in comma-separated fields, matching the "Not Empty" filter.
+EMPTY_TOKENS = {"", "nan", "n/a"}
+
+# Rows read at a time when a migration backfills from contacts.
+BACKFILL_BATCH = 10000
+
+# "Similar to" name search: minimum trigram similarity and most candidates kept.
+FUZZY_THRESHOLD = 0.3
+FUZZY_LIMIT = 200
+
+
+##############################################################################
+# Schema migrations for contacts.db, tracked with PRAGMA user_version
+##############################################################################
+def create_contacts(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS contacts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            full_name TEXT,
+            phone TEXT,
+            email TEXT,
+            data_source TEXT,
+            tags TEXT,
+            country TEXT
+        )
+    """)
+
+def fts_tokenizer():
+    # The trigram tokenizer gives substring ("contains") matches; it needs SQLite 3.34+.
+    if sqlite3.sqlite_version_info >= (3, 34, 0):
+        return "trigram"
+    return "unicode61 remove_diacritics 2"
+
+def create_search_indexes(conn):
+    for col in INDEXED_COLUMNS:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_contacts_{col} ON contacts ({col})")
+    conn.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5(
+            full_name, email,
+            content='contacts', content_rowid='id', tokenize='{fts_tokenizer()}'
+        )
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS contacts_fts_ai AFTER INSERT ON contacts BEGIN
+            INSERT INTO contacts_fts (rowid, full_name, email)
+            VALUES (new.id, new.full_name, new.email);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS contacts_fts_ad AFTER DELETE ON contacts BEGIN
+            INSERT INTO contacts_fts (contacts_fts, rowid, full_name, email)
+            VALUES ('delete', old.id, old.full_name, old.email);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS contacts_fts_au AFTER UPDATE OF full_name, email ON contacts BEGIN
+            INSERT INTO contacts_fts (contacts_fts, rowid, full_name, email)
+            VALUES ('delete', old.id, old.full_name, old.email);
+            INSERT INTO contacts_fts (rowid, full_name, email)
+            VALUES (new.id, new.full_name, new.email);
+        END
+    """)
+    conn.execute("INSERT INTO contacts_fts (contacts_fts) VALUES ('rebuild')")
+
+def create_facets(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS contact_facets (
+            column_name TEXT NOT NULL,
+            value TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (column_name, value)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_contact_facets_count
+        ON contact_facets (column_name, count DESC)
+    """)
+    # Later facet columns are seeded by the migration that adds them.
+    seed_facets(conn, ["country", "data_source", "tags"])
+
+def seed_facets(conn, columns):
+    for col in columns:
+        conn.execute(f"""
+            INSERT INTO contact_facets (column_name, value, count)
+            SELECT ?, {col}, COUNT(*) FROM contacts
+            WHERE {col} IS NOT NULL AND {col} != ''
+            GROUP BY {col}
+        """, (col,))
+
+def create_identity_keys(conn):
+    # identity_key is "p:<E.164 phone>" or else "e:<lowercased email>"; rows already
+    # in the table keep it only on the first contact per key so the index can be unique.
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(contacts)")]
+    if "identity_key" not in columns:
+        conn.execute("ALTER TABLE contacts ADD COLUMN identity_key TEXT")
+    key_expr = """
+        CASE WHEN phone LIKE '+%' THEN 'p:' || phone
+             WHEN instr(email, '@') > 0 THEN 'e:' || lower(trim(email)) END
+    """
+    conn.execute(f"""
+        UPDATE contacts SET identity_key = {key_expr}
+        WHERE id IN (
+            SELECT MIN(id) FROM contacts
+            WHERE {key_expr} IS NOT NULL
+            GROUP BY {key_expr}
+        )
+    """)
+    conn.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_contacts_identity_key
+        ON contacts (identity_key)
+    """)
+
+def create_tag_index(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS tags (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE COLLATE NOCASE
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS contact_tags (
+            contact_id INTEGER NOT NULL,
+            tag_id INTEGER NOT NULL,
+            PRIMARY KEY (tag_id, contact_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_contact_tags_contact ON contact_tags (contact_id)")
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS contact_tags_ad AFTER DELETE ON contacts BEGIN
+            DELETE FROM contact_tags WHERE contact_id = old.id;
+        END
+    """)
+    cursor = conn.execute("SELECT id, tags FROM contacts WHERE tags IS NOT NULL AND tags != ''")
+    while True:
+        batch = cursor.fetchmany(BACKFILL_BATCH)
+        if not batch:
+            break
+        link_tags(conn, [(contact_id, tag) for contact_id, tags in batch for tag in split_tokens(tags)])
+
+def create_name_trigrams(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS name_trigrams (
+            trigram TEXT NOT NULL,
+            contact_id INTEGER NOT NULL,
+            PRIMARY KEY (trigram, contact_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS name_trigram_counts (
+            contact_id INTEGER PRIMARY KEY,
+            trigram_count INTEGER NOT NULL
+        )
+    """)
+    # Postings of deleted contacts are left behind; searches join name_trigram_counts,
+    # so dropping the count row is enough to hide them.
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS name_trigrams_ad AFTER DELETE ON contacts BEGIN
+            DELETE FROM name_trigram_counts WHERE contact_id = old.id;
+        END
+    """)
+    cursor = conn.execute("SELECT id, full_name FROM contacts WHERE full_name IS NOT NULL")
+    while True:
+        batch = cursor.fetchmany(BACKFILL_BATCH)
+        if not batch:
+            break
+        index_names(conn, batch)
+
+def create_e164_columns(conn):
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(contacts)")]
+    for col, kind in zip(E164_COLUMNS, ["INTEGER", "INTEGER", "TEXT"]):
+        if col not in columns:
+            conn.execute(f"ALTER TABLE contacts ADD COLUMN {col} {kind}")
+    cursor = conn.execute("SELECT id, phone, country FROM contacts WHERE phone LIKE '+%'")
+    while True:
+        batch = cursor.fetchmany(BACKFILL_BATCH)
+        if not batch:
+            break
+        conn.executemany("""
+            UPDATE contacts SET dial_code = ?, national_number = ?, country_code = ? WHERE id = ?
+        """, [e164_parts(phone, country) + (contact_id,) for contact_id, phone, country in batch])
+    # Prefix filters become range scans over (dial_code, national_number).
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_contacts_e164
+        ON contacts (dial_code, national_number)
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_contacts_country_code ON contacts (country_code)")
+    seed_facets(conn, ["country_code"])
+
+def create_duplicate_clusters(conn):
+    # Written by the dedupe job (dedupe.py); each contact is in at most one cluster.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS duplicate_clusters (
+            contact_id INTEGER PRIMARY KEY,
+            cluster_id INTEGER NOT NULL,
+            score REAL NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_duplicate_clusters_cluster ON duplicate_clusters (cluster_id)")
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS duplicate_clusters_ad AFTER DELETE ON contacts BEGIN
+            DELETE FROM duplicate_clusters WHERE contact_id = old.id;
+        END
+    """)
+
+def create_table_versions(conn):
+    # Bumped by every write to contacts so in-memory copies can tell they are stale.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS table_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        )
+    """)
+    conn.execute("INSERT OR IGNORE INTO table_versions (name, version) VALUES ('contacts', 0)")
+
+def create_fts_pause(conn):
+    # Bulk loads pause the per-row FTS insert trigger with a row in fts_paused
+    # instead of dropping it, so no schema change invalidates cached statements
+    # on the other connections.
+    conn.execute("CREATE TABLE IF NOT EXISTS fts_paused (id INTEGER PRIMARY KEY CHECK (id = 1))")
+    conn.execute("DROP TRIGGER IF EXISTS contacts_fts_ai")
+    conn.execute("""
+        CREATE TRIGGER contacts_fts_ai AFTER INSERT ON contacts
+        WHEN NOT EXISTS (SELECT 1 FROM fts_paused) BEGIN
+            INSERT INTO contacts_fts (rowid, full_name, email)
+            VALUES (new.id, new.full_name, new.email);
+        END
+    """)
+
+MIGRATIONS = [
+    create_contacts,
+    create_search_indexes,
+    create_facets,
+    create_identity_keys,
+    create_tag_index,
+    create_name_trigrams,
+    create_e164_columns,
+    create_duplicate_clusters,
+    create_table_versions,
+    create_fts_pause,
+]
+
+def init_db(conn):
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for target, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        if not conn.in_transaction:
+            conn.execute("BEGIN")
+        try:
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {target}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+##############################################################################
+# Connections: tuned once and kept open for the life of the app
+##############################################################################
+def open_connection(db_path=DB_NAME, readonly=False):
+    # Autocommit mode; writers manage BEGIN/COMMIT themselves.
+    conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False,
+                           cached_statements=STATEMENT_CACHE)
+    if not readonly:
+        conn.execute("PRAGMA journal_mode=WAL")
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    if readonly:
+        conn.execute("PRAGMA query_only=ON")
+    return conn
+
+class ConnectionManager:
+    # One writer for imports, one reader for the filter UI. With WAL the reader
+    # keeps working while an import is writing.
+    def __init__(self, db_path=DB_NAME):
+        self.db_path = db_path
+        self.write_conn = None
+        self.read_conn = None
+
+    def writer(self):
+        if self.write_conn is None:
+            self.write_conn = open_connection(self.db_path)
+            init_db(self.write_conn)
+        return self.write_conn
+
+    def reader(self):
+        if self.read_conn is None:
+            self.writer()
+            self.read_conn = open_connection(self.db_path, readonly=True)
+        return self.read_conn
+
+    def close(self):
+        for conn in (self.read_conn, self.write_conn):
+            if conn is not None:
+                conn.close()
+        self.read_conn = None
+        self.write_conn = None
+
+def bump_version(conn, name="contacts"):
+    conn.execute("UPDATE table_versions SET version = version + 1 WHERE name = ?", (name,))
+
+def table_version(conn, name="contacts"):
+    row = conn.execute("SELECT version FROM table_versions WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else 0
+
+##############################################################################
+# Bulk loads: index new rows in one statement instead of a trigger per row
+##############################################################################
+def suspend_fts_trigger(conn):
+    # Call inside the load's transaction; a rollback also undoes the pause.
+    conn.execute("INSERT OR IGNORE INTO fts_paused (id) VALUES (1)")
+    return conn.execute("SELECT COALESCE(MAX(id), 0) FROM contacts").fetchone()[0]
+
+def resume_fts_trigger(conn, after_id):
+    conn.execute("""
+        INSERT INTO contacts_fts (rowid, full_name, email)
+        SELECT id, full_name, email FROM contacts WHERE id > ?
+    """, (after_id,))
+    conn.execute("DELETE FROM fts_paused")
+
+##############################################################################
+# Facets: distinct values per column for the filter dropdowns
+##############################################################################
+def add_facet_counts(conn, column, counts):
+    conn.executemany("""
+        INSERT INTO contact_facets (column_name, value, count) VALUES (?, ?, ?)
+        ON CONFLICT (column_name, value) DO UPDATE SET count = count + excluded.count
+    """, [(column, value, count) for value, count in counts])
+    conn.execute("DELETE FROM contact_facets WHERE column_name = ? AND count <= 0", (column,))
+
+def escape_like(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def facet_values(conn, column, prefix="", limit=FACET_LIMIT):
+    # Most frequent values first; a prefix narrows the list for type-ahead.
+    upper = prefix + "\U0010ffff"
+    if column in FACET_COLUMNS:
+        rows = conn.execute("""
+            SELECT value FROM contact_facets
+            WHERE column_name = ? AND value >= ? AND value < ?
+            ORDER BY count DESC, value LIMIT ?
+        """, (column, prefix, upper, limit))
+    elif column in INDEXED_COLUMNS:
+        # Walk the index in order instead of collecting every distinct value.
+        rows = conn.execute(f"""
+            SELECT DISTINCT {column} FROM contacts
+            WHERE {column} != '' AND {column} >= ? AND {column} < ?
+            ORDER BY {column} LIMIT ?
+        """, (prefix, upper, limit))
+    elif column == "id":
+        rows = conn.execute("""
+            SELECT id FROM contacts WHERE CAST(id AS TEXT) LIKE ? ESCAPE '\\'
+            ORDER BY id LIMIT ?
+        """, (escape_like(prefix) + "%", limit))
+    else:
+        rows = conn.execute(f"""
+            SELECT DISTINCT {column} FROM contacts
+            WHERE {column} != '' AND {column} LIKE ? ESCAPE '\\'
+            LIMIT ?
+        """, (escape_like(prefix) + "%", limit))
+    return [str(row[0]) for row in rows]
+
+##############################################################################
+# Tags: comma-separated contacts.tags mirrored into tags / contact_tags
+##############################################################################
+def split_tokens(value):
+    tokens = []
+    for token in str(value).split(","):
+        token = token.strip()
+        if token.lower() not in EMPTY_TOKENS and token not in tokens:
+            tokens.append(token)
+    return tokens
+
+def link_tags(conn, pairs):
+    # pairs: (contact_id, tag name); names match case-insensitively.
+    pairs = list(pairs)
+    if not pairs:
+        return
+    names = {name for _, name in pairs}
+    conn.executemany("INSERT OR IGNORE INTO tags (name) VALUES (?)", ((name,) for name in names))
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS import_tags (name TEXT PRIMARY KEY)")
+    conn.execute("DELETE FROM import_tags")
+    conn.executemany("INSERT INTO import_tags (name) VALUES (?)", ((name,) for name in names))
+    tag_ids = dict(conn.execute("SELECT i.name, t.id FROM import_tags i JOIN tags t ON t.name = i.name COLLATE NOCASE"))
+    conn.executemany("INSERT OR IGNORE INTO contact_tags (contact_id, tag_id) VALUES (?, ?)",
+                     ((contact_id, tag_ids[name]) for contact_id, name in pairs))
+
+def tag_names(conn, prefix="", limit=FACET_LIMIT):
+    rows = conn.execute("""
+        SELECT name FROM tags WHERE name LIKE ? ESCAPE '\\' ORDER BY name LIMIT ?
+    """, (escape_like(prefix) + "%", limit))
+    return [row[0] for row in rows]
+
+##############################################################################
+# Fuzzy names: trigram postings for "similar to" search
+##############################################################################
+def index_names(conn, rows):
+    # rows: (contact_id, full_name)
+    postings = []
+    counts = []
+    seen = {}  # common names repeat a lot; fold each distinct one once
+    for contact_id, name in rows:
+        trigrams = seen.get(name)
+        if trigrams is None:
+            folded = fold_name(name)
+            trigrams = seen[name] = folded_trigrams(folded) if folded not in EMPTY_TOKENS else set()
+        if not trigrams:
+            continue
+        postings.extend((trigram, contact_id) for trigram in trigrams)
+        counts.append((contact_id, len(trigrams)))
+    conn.executemany("INSERT OR IGNORE INTO name_trigrams (trigram, contact_id) VALUES (?, ?)", postings)
+    conn.executemany("INSERT OR REPLACE INTO name_trigram_counts (contact_id, trigram_count) VALUES (?, ?)", counts)
+
+def similar_names_query(name, threshold=FUZZY_THRESHOLD, limit=FUZZY_LIMIT):
+    # Ranked (contact_id, score) candidates, score = shared / union of trigrams.
+    # Only postings of the query's own trigrams are read, never the whole table.
+    trigrams = sorted(name_trigrams(name))
+    if not trigrams:
+        return None
+    min_shared = max(1, math.ceil(threshold * len(trigrams)))
+    placeholders = ", ".join("?" for _ in trigrams)
+    sql = f"""
+        SELECT m.contact_id, m.shared * 1.0 / (? + c.trigram_count - m.shared) AS score
+        FROM (
+            SELECT contact_id, COUNT(*) AS shared FROM name_trigrams
+            WHERE trigram IN ({placeholders})
+            GROUP BY contact_id HAVING COUNT(*) >= ?
+        ) m JOIN name_trigram_counts c ON c.contact_id = m.contact_id
+        WHERE score >= ?
+        ORDER BY score DESC, m.contact_id LIMIT ?
+    """
+    return sql, [len(trigrams)] + trigrams + [min_shared, threshold, limit]
+
+def similar_names(conn, name, threshold=FUZZY_THRESHOLD, limit=FUZZY_LIMIT):
+    query = similar_names_query(name, threshold, limit)
+    if query is None:
+        return []
+    sql, params = query
+    return conn.execute(f"""
+        SELECT s.contact_id, c.full_name, s.score
+        FROM ({sql}) s JOIN contacts c ON c.id = s.contact_id
+        ORDER BY s.score DESC, s.contact_id
+    """, params).fetchall()
@@ -0,0 +1,311 @@
+import argparse
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+from itertools import combinations
+from database import (DB_NAME, E164_COLUMNS, EMPTY_TOKENS, FACET_COLUMNS, add_facet_counts, bump_version, init_db, link_tags,
+                      open_connection, split_tokens)
+from fuzzy import fold_name, folded_trigrams
+from importer import MERGED_COLUMNS, merge_field
+
+# Sorted-neighborhood: each name is compared with the next DEDUPE_WINDOW - 1 names.
+DEDUPE_WINDOW = 5
+
+# Phone/email blocks larger than this (shared office lines, info@ mailboxes) are skipped.
+MAX_BLOCK = 50
+
+# Sorted names are cut into runs of this many, overlapping by the window.
+WINDOW_RUN = 5000
+
+# Contacts sent to a worker process per task.
+TASK_SIZE = 20000
+
+# Pair score: name similarity plus phone/email evidence, clamped to 0..1. Different
+# phones or emails on both sides count against a match, so an identical name only
+# reaches the threshold when nothing contradicts it.
+NAME_WEIGHT = 0.6
+PHONE_WEIGHT = 0.5
+EMAIL_WEIGHT = 0.5
+EMAIL_LOCAL_WEIGHT = 0.3
+PHONE_CONFLICT = -0.3
+EMAIL_CONFLICT = -0.2
+DEDUPE_THRESHOLD = 0.6
+
+# Clusters the duplicates screen lists at once, best scores first.
+CLUSTER_LIMIT = 200
+
+##############################################################################
+# Duplicate clusters: blocking keys give candidate pairs in near-linear time,
+# pairs are scored in a process pool and linked into clusters. Usage:
+#   python dedupe.py --db contacts.db --workers 4
+# Clusters are written to duplicate_clusters and merged from the app.
+##############################################################################
+def email_parts(email):
+    # (lowercased address, local part without "+suffix"); short locals are too common to block on.
+    email = str(email or "").strip().lower()
+    if "@" not in email:
+        return "", ""
+    local = email.split("@", 1)[0].split("+", 1)[0]
+    return email, local if len(local) >= 3 else ""
+
+def load_records(conn):
+    # {contact_id: (folded name, E.164 phone, email, email local part)}
+    records = {}
+    for contact_id, name, phone, email in conn.execute("SELECT id, full_name, phone, email FROM contacts"):
+        folded = fold_name(name) if name is not None else ""
+        if folded in EMPTY_TOKENS:
+            folded = ""
+        phone = phone if phone and phone.startswith("+") else ""
+        records[contact_id] = (folded, phone) + email_parts(email)
+    return records
+
+def key_blocks(records):
+    groups = {}
+    for contact_id, (_, phone, _, local) in records.items():
+        if phone:
+            groups.setdefault("p:" + phone, []).append(contact_id)
+        if local:
+            groups.setdefault("e:" + local, []).append(contact_id)
+    return [("key", ids) for ids in groups.values() if 1 < len(ids) <= MAX_BLOCK]
+
+def window_blocks(records):
+    # Names sort by their words in order, so "Yilmaz Mehmet" lands next to "Mehmet Yilmaz".
+    named = sorted((" ".join(sorted(record[0].split())), contact_id)
+                   for contact_id, record in records.items() if record[0])
+    ids = [contact_id for _, contact_id in named]
+    return [("window", ids[start:start + WINDOW_RUN + DEDUPE_WINDOW - 1])
+            for start in range(0, len(ids) - 1, WINDOW_RUN)]
+
+def candidate_pairs(kind, ids):
+    if kind == "key":
+        return combinations(ids, 2)
+    return ((a, b) for i, a in enumerate(ids) for b in ids[i + 1:i + DEDUPE_WINDOW])
+
+def score_pair(a, b, trigrams):
+    name = 0.0
+    if a[0] and b[0]:
+        if a[0] == b[0]:
+            name = 1.0
+        else:
+            ta = trigrams.get(a[0]) or trigrams.setdefault(a[0], folded_trigrams(a[0]))
+            tb = trigrams.get(b[0]) or trigrams.setdefault(b[0], folded_trigrams(b[0]))
+            name = len(ta & tb) / len(ta | tb)
+    score = NAME_WEIGHT * name
+    if a[1] and b[1]:
+        score += PHONE_WEIGHT if a[1] == b[1] else PHONE_CONFLICT
+    if a[2] and b[2]:
+        if a[2] == b[2]:
+            score += EMAIL_WEIGHT
+        elif a[3] and a[3] == b[3]:
+            score += EMAIL_LOCAL_WEIGHT
+        else:
+            score += EMAIL_CONFLICT
+    return min(max(score, 0.0), 1.0)
+
+def score_blocks(blocks, records):
+    # Runs in a worker process; returns ({(low id, high id): score}, pairs compared).
+    trigrams = {}
+    seen = set()
+    matches = {}
+    for kind, ids in blocks:
+        for a, b in candidate_pairs(kind, ids):
+            pair = (a, b) if a < b else (b, a)
+            if pair in seen:
+                continue
+            seen.add(pair)
+            score = score_pair(records[a], records[b], trigrams)
+            if score >= DEDUPE_THRESHOLD:
+                matches[pair] = score
+    return matches, len(seen)
+
+def block_tasks(blocks, records):
+    # Group blocks so each task carries about TASK_SIZE contacts and only their records.
+    task, size = [], 0
+    for block in blocks:
+        task.append(block)
+        size += len(block[1])
+        if size >= TASK_SIZE:
+            yield task, {contact_id: records[contact_id] for _, ids in task for contact_id in ids}
+            task, size = [], 0
+    if task:
+        yield task, {contact_id: records[contact_id] for _, ids in task for contact_id in ids}
+
+def conflicting(a, b):
+    # Both sides know phones (or emails) and none of them are shared.
+    return bool(a and b and a.isdisjoint(b))
+
+def cluster_pairs(matches, records):
+    # Union-find over pairs, strongest first; the smallest contact id is each cluster's
+    # root and cluster_id. Clusters with different phones or emails are never joined,
+    # so contacts without either cannot chain unrelated people together.
+    parent = {}
+    phones = {}
+    emails = {}
+    def find(x):
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+    best = {}
+    for (a, b), score in sorted(matches.items(), key=lambda item: (-item[1], item[0])):
+        for contact_id in (a, b):
+            if contact_id not in parent:
+                parent[contact_id] = contact_id
+                phones[contact_id] = {records[contact_id][1]} - {""}
+                emails[contact_id] = {records[contact_id][2]} - {""}
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            if conflicting(phones[ra], phones[rb]) or conflicting(emails[ra], emails[rb]):
+                continue
+            root, child = min(ra, rb), max(ra, rb)
+            parent[child] = root
+            phones[root] |= phones.pop(child)
+            emails[root] |= emails.pop(child)
+        best[a] = max(best.get(a, 0.0), score)
+        best[b] = max(best.get(b, 0.0), score)
+    return [(contact_id, find(contact_id), score) for contact_id, score in best.items()]
+
+def write_clusters(conn, rows):
+    conn.execute("BEGIN")
+    try:
+        conn.execute("DELETE FROM duplicate_clusters")
+        conn.executemany("INSERT INTO duplicate_clusters (contact_id, cluster_id, score) VALUES (?, ?, ?)", rows)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+def find_duplicates(db_path=DB_NAME, workers=None, conn=None):
+    started = time.perf_counter()
+    own_conn = conn is None
+    if own_conn:
+        conn = open_connection(db_path)
+    try:
+        init_db(conn)
+        records = load_records(conn)
+        blocks = key_blocks(records) + window_blocks(records)
+        matches = {}
+        compared = 0
+        if workers == 1:
+            results = (score_blocks(*task) for task in block_tasks(blocks, records))
+            for found, count in results:
+                matches.update(found)
+                compared += count
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(score_blocks, *task) for task in block_tasks(blocks, records)]
+                for future in futures:
+                    found, count = future.result()
+                    matches.update(found)
+                    compared += count
+        rows = cluster_pairs(matches, records)
+        write_clusters(conn, rows)
+    finally:
+        if own_conn:
+            conn.close()
+    return {
+        "contacts": len(records),
+        "blocks": len(blocks),
+        "compared": compared,
+        "pairs": len(matches),
+        "clusters": len({cluster_id for _, cluster_id, _ in rows}),
+        "duplicates": len(rows),
+        "seconds": time.perf_counter() - started,
+    }
+
+##############################################################################
+# Reviewing and merging clusters
+##############################################################################
+CLUSTER_FIELDS = ["id", "full_name", "phone", "email", "data_source", "tags"]
+
+# Details a merge copies from the other members when the kept contact has none. Each
+# group comes from one member, so a phone keeps its own country and E.164 parts.
+FILLED_GROUPS = [["phone", "country"] + E164_COLUMNS, ["email"], ["identity_key"]]
+
+def load_clusters(conn, limit=CLUSTER_LIMIT):
+    # [(cluster_id, [(score, *CLUSTER_FIELDS), ...]), ...]
+    rows = conn.execute(f"""
+        SELECT d.cluster_id, d.score, {", ".join("c." + col for col in CLUSTER_FIELDS)}
+        FROM (
+            SELECT cluster_id, MAX(score) AS best FROM duplicate_clusters
+            GROUP BY cluster_id ORDER BY best DESC, cluster_id LIMIT ?
+        ) top
+        JOIN duplicate_clusters d ON d.cluster_id = top.cluster_id
+        JOIN contacts c ON c.id = d.contact_id
+        ORDER BY top.best DESC, d.cluster_id, c.id
+    """, (limit,)).fetchall()
+    clusters = {}
+    for cluster_id, *member in rows:
+        clusters.setdefault(cluster_id, []).append(tuple(member))
+    return list(clusters.items())
+
+def merge_cluster(conn, cluster_id, keep_id=None):
+    # Folds every member into keep_id (default: the oldest contact) and deletes the rest.
+    # Data sources and tags are combined the same way an upsert import combines them;
+    # a missing phone, email or identity key is taken from the first member that has one.
+    filled_columns = [col for group in FILLED_GROUPS for col in group]
+    columns = list(dict.fromkeys(MERGED_COLUMNS + FACET_COLUMNS + filled_columns))
+    rows = conn.execute(f"""
+        SELECT c.id, {", ".join("c." + col for col in columns)}
+        FROM duplicate_clusters d JOIN contacts c ON c.id = d.contact_id
+        WHERE d.cluster_id = ? ORDER BY c.id
+    """, (cluster_id,)).fetchall()
+    members = [dict(zip(["id"] + columns, row)) for row in rows]
+    keep = next((member for member in members if member["id"] == keep_id), members[0] if members else None)
+    removed = [member for member in members if member is not keep]
+    deltas = {col: Counter() for col in FACET_COLUMNS}
+    for member in removed:
+        for col in FACET_COLUMNS:
+            if member[col]:
+                deltas[col][member[col]] -= 1
+    merged = {}
+    if keep is not None:
+        for col in MERGED_COLUMNS:
+            merged[col] = reduce(merge_field, [member[col] or "" for member in removed], keep[col] or "")
+        for group in FILLED_GROUPS:
+            source = next((member for member in removed if member[group[0]]), None)
+            if not keep[group[0]] and source is not None:
+                merged.update((col, source[col]) for col in group)
+        for col, value in merged.items():
+            old = keep[col] or ""
+            if (value or "") != old and col in deltas:
+                if old:
+                    deltas[col][old] -= 1
+                if value:
+                    deltas[col][value] += 1
+    conn.execute("BEGIN")
+    try:
+        # Triggers drop the deleted contacts' full-text, tag and trigram rows. Deleting
+        # first frees their identity keys for the kept contact.
+        conn.executemany("DELETE FROM contacts WHERE id = ?", [(member["id"],) for member in removed])
+        if merged:
+            conn.execute(f"UPDATE contacts SET {', '.join(col + ' = ?' for col in merged)} WHERE id = ?",
+                         list(merged.values()) + [keep["id"]])
+            link_tags(conn, [(keep["id"], tag) for tag in split_tokens(merged["tags"])])
+        conn.execute("DELETE FROM duplicate_clusters WHERE cluster_id = ?", (cluster_id,))
+        for col, counts in deltas.items():
+            add_facet_counts(conn, col, counts.items())
+        bump_version(conn)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return len(removed)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find duplicate contacts and write them to duplicate_clusters.")
+    parser.add_argument("--db", default=DB_NAME, help="database file (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="scoring processes")
+    args = parser.parse_args(argv)
+    stats = find_duplicates(args.db, args.workers)
+    print(f"{stats['contacts']} contacts, {stats['blocks']} blocks, {stats['compared']} pairs compared "
+          f"in {stats['seconds']:.1f}s; {stats['pairs']} matches in {stats['clusters']} clusters "
+          f"({stats['duplicates']} contacts)")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
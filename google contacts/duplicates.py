@@ -0,0 +1,121 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+import threading
+from dedupe import CLUSTER_FIELDS, find_duplicates, load_clusters, merge_cluster
+from translations import translations
+
+##############################################################################
+# DuplicatesFrame: runs the dedupe job and merges the clusters it finds.
+# Each cluster is a tree row with its contacts underneath; merging keeps the
+# selected contact (or the oldest one when the cluster row is selected).
+##############################################################################
+class DuplicatesFrame(tk.Frame):
+    def __init__(self, master, controller):
+        tk.Frame.__init__(self, master)
+        self.controller = controller
+        self.stats = None
+        self.button_frame = tk.Frame(self)
+        self.button_frame.pack(pady=10, fill="x")
+        self.find_button = tk.Button(self.button_frame, command=self.find)
+        self.find_button.pack(side="left", padx=5)
+        self.merge_button = tk.Button(self.button_frame, command=self.merge_selected)
+        self.merge_button.pack(side="left", padx=5)
+        self.status_label = tk.Label(self)
+        self.status_label.pack(anchor="w")
+        self.tree_frame = tk.Frame(self)
+        self.tree_frame.pack(pady=10, fill="both", expand=True)
+        self.columns = ["score"] + CLUSTER_FIELDS[1:]
+        self.tree = ttk.Treeview(self.tree_frame, columns=self.columns, show="tree headings")
+        for col in self.columns:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=110)
+        self.scrollbar = ttk.Scrollbar(self.tree_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.back_button = tk.Button(self, command=lambda: self.controller.show_frame("MainMenuFrame"))
+        self.back_button.pack(pady=10)
+        self.load_clusters()
+
+    def update_texts(self):
+        t = translations[self.controller.lang]
+        self.find_button.config(text=t["find_duplicates"])
+        self.merge_button.config(text=t["merge_cluster"])
+        self.back_button.config(text=t["back_main"])
+        self.tree.heading("#0", text=t["cluster"])
+        self.update_status()
+
+    def update_status(self):
+        t = translations[self.controller.lang]
+        if self.stats is None:
+            self.status_label.config(text="")
+        elif self.stats == "running":
+            self.status_label.config(text=t["dedupe_running"])
+        else:
+            self.status_label.config(text=t["dedupe_stats"].format(**self.stats))
+
+    def load_clusters(self):
+        t = translations[self.controller.lang]
+        try:
+            clusters = load_clusters(self.controller.db.reader())
+        except Exception as e:
+            messagebox.showerror(t["error"], f"{t['contacts_load_fail']}: {e}")
+            return
+        self.tree.delete(*self.tree.get_children())
+        for cluster_id, members in clusters:
+            parent = self.tree.insert("", "end", iid=f"c{cluster_id}", open=True,
+                                      text=f"#{cluster_id} ({len(members)})")
+            for score, contact_id, *fields in members:
+                self.tree.insert(parent, "end", iid=f"m{contact_id}", text=str(contact_id),
+                                 values=[f"{score:.2f}"] + fields)
+
+    def find(self):
+        # The job runs on a worker thread (scoring in a process pool); the Tk thread polls.
+        job = {"done": False, "error": None, "stats": None}
+        def run():
+            try:
+                job["stats"] = find_duplicates(db_path=self.controller.db.db_path)
+            except Exception as e:
+                job["error"] = e
+            job["done"] = True
+        self.find_button.config(state=tk.DISABLED)
+        self.merge_button.config(state=tk.DISABLED)
+        self.stats = "running"
+        self.update_status()
+        threading.Thread(target=run, daemon=True).start()
+        self.after(100, lambda: self.finish_find(job))
+
+    def finish_find(self, job):
+        if not job["done"]:
+            self.after(100, lambda: self.finish_find(job))
+            return
+        t = translations[self.controller.lang]
+        self.find_button.config(state=tk.NORMAL)
+        self.merge_button.config(state=tk.NORMAL)
+        self.stats = job["stats"]
+        self.update_status()
+        if job["error"] is not None:
+            messagebox.showerror(t["error"], f"{t['dedupe_fail']}: {job['error']}")
+            return
+        self.load_clusters()
+
+    def merge_selected(self):
+        t = translations[self.controller.lang]
+        selection = self.tree.selection()
+        if not selection:
+            messagebox.showerror(t["error"], t["select_cluster"])
+            return
+        item = selection[0]
+        keep_id = None
+        if item.startswith("m"):
+            keep_id = int(item[1:])
+            item = self.tree.parent(item)
+        cluster_id = int(item[1:])
+        if not messagebox.askyesno(t["merge_cluster"], t["merge_confirm"].format(cluster=cluster_id)):
+            return
+        try:
+            merge_cluster(self.controller.db.writer(), cluster_id, keep_id)
+        except Exception as e:
+            messagebox.showerror(t["error"], f"{t['merge_fail']}: {e}")
+            return
+        self.tree.delete(f"c{cluster_id}")
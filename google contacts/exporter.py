@@ -0,0 +1,59 @@
+import csv
+from database import DB_NAME, open_connection
+
+EXPORT_BATCH = 5000
+
+# Rows per worksheet in an .xlsx file, header included.
+EXCEL_MAX_ROWS = 1048576
+
+##############################################################################
+# Streaming export: rows go from the SQLite cursor to the file batch by batch
+##############################################################################
+def stream_rows(db_path, query, params, batch_size=EXPORT_BATCH):
+    # A connection of its own: exports run on a worker thread next to the UI reader.
+    conn = open_connection(db_path, readonly=True)
+    try:
+        cursor = conn.execute(query, params)
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            yield batch
+    finally:
+        conn.close()
+
+def write_csv(file_path, columns, batches):
+    written = 0
+    with open(file_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for batch in batches:
+            writer.writerows(batch)
+            written += len(batch)
+    return written
+
+def write_excel(file_path, columns, batches):
+    from openpyxl import Workbook # type: ignore
+    workbook = Workbook(write_only=True)
+    sheet = None
+    sheet_rows = EXCEL_MAX_ROWS
+    written = 0
+    for batch in batches:
+        for row in batch:
+            if sheet_rows >= EXCEL_MAX_ROWS:
+                sheet = workbook.create_sheet(f"Sheet{len(workbook.worksheets) + 1}")
+                sheet.append(columns)
+                sheet_rows = 1
+            sheet.append(row)
+            sheet_rows += 1
+            written += 1
+    if sheet is None:
+        workbook.create_sheet("Sheet1").append(columns)
+    workbook.save(file_path)
+    return written
+
+def export_query(query, params, columns, file_path, filetype, db_path=DB_NAME, batch_size=EXPORT_BATCH):
+    batches = stream_rows(db_path, query, params, batch_size)
+    if filetype == "csv":
+        return write_csv(file_path, columns, batches)
+    return write_excel(file_path, columns, batches)
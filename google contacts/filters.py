@@ -1,8 +1,12 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import pandas as pd # type: ignore
-import sqlite3
+import threading
+from contact_cache import ContactCache
+from database import facet_values, open_connection, tag_names
+from exporter import export_query
+from queries import CONDITIONS, CONTACT_FIELDS, TEXT_CONDITIONS, build_filter_query, filter_order
 from translations import translations
+from virtual_grid import VirtualGrid
 
 ##############################################################################
 # FilterFrame: Handles filtering/extracting data from the database, export, and new filter type
@@ -11,7 +15,7 @@ class FilterFrame(tk.Frame):
     def __init__(self, master, controller):
         tk.Frame.__init__(self, master)
         self.controller = controller
-        self.columns = ["id", "full_name", "phone", "email", "data_source", "tags", "country"]
+        self.columns = list(CONTACT_FIELDS)
         # Filtering area
         self.filter_frame = tk.Frame(self)
         self.filter_frame.pack(pady=10, fill="x")
@@ -28,11 +32,20 @@ class FilterFrame(tk.Frame):
         self.search_button.pack(side="left", padx=5)
         self.clear_filters_button = tk.Button(self.button_frame, command=self.clear_filters)
         self.clear_filters_button.pack(side="left", padx=5)
-        self.tree = ttk.Treeview(self.results_frame, columns=self.columns, show="headings")
-        for col in self.columns:
-            self.tree.heading(col, text=col)
-            self.tree.column(col, width=120)
-        self.tree.pack(fill="both", expand=True)
+        # Optional in-memory mode: filters run as masks over a ContactCache.
+        self.cache = ContactCache()
+        self.cache_loading = False
+        self.use_cache = tk.BooleanVar(value=False)
+        self.cache_check = tk.Checkbutton(self.button_frame, variable=self.use_cache, command=self.toggle_cache)
+        self.cache_check.pack(side="left", padx=5)
+        self.cache_label = tk.Label(self.button_frame)
+        self.cache_label.pack(side="left", padx=5)
+        self.results = VirtualGrid(self.results_frame, self.columns, self.controller.db,
+                                   on_change=self.update_row_status)
+        self.results.pack(fill="both", expand=True)
+        self.row_status = (0, 0, 0)
+        self.row_status_label = tk.Label(self.results_frame)
+        self.row_status_label.pack(anchor="w")
         # Export options
         self.export_frame = tk.Frame(self)
         self.export_frame.pack(pady=10, fill="x")
@@ -64,7 +77,7 @@ class FilterFrame(tk.Frame):
         self.export_excel_button.config(text=t["export_excel"])
         self.back_button.config(text=t["back_main"])
         # Update condition dropdown labels if needed by iterating filter rows.
-        for row in self.filter_rows:
+        for index, row in enumerate(self.filter_rows):
             # If the condition dropdown exists, update its menu
             cond = row.get("condition")
             if cond:
@@ -75,9 +88,9 @@ class FilterFrame(tk.Frame):
                     # Clear and add new options from translation dictionary.
                     menu = cond_menu["menu"]
                     menu.delete(0, "end")
-                    for option in [t["equals"], t["not_empty"]]:
-                        menu.add_command(label=option, command=lambda opt=option, var=cond: var.set(opt))
-                    cond.set(t["equals"])  # default back to Equals
+                    for option in self.condition_options():
+                        menu.add_command(label=option, command=lambda opt=option, row=index: self.set_condition(row, opt))
+                    self.set_condition(index, t["equals"])  # default back to Equals
 
     def add_filter_row(self, first=False):
         row_index = len(self.filter_rows)
@@ -95,115 +108,187 @@ class FilterFrame(tk.Frame):
                                  command=lambda event, row=row_index: self.update_value_options(row))
         col_menu.grid(row=row_index, column=col_offset, padx=5, pady=5)
         row_widgets["column"] = col_var
-        # New: Condition dropdown (Equals or Not Empty)
+        # New: Condition dropdown (see queries.CONDITIONS)
         cond_var = tk.StringVar(value=translations[self.controller.lang]["equals"])
-        cond_menu = tk.OptionMenu(self.filter_frame, cond_var, translations[self.controller.lang]["equals"],
-                                  translations[self.controller.lang]["not_empty"],
+        cond_menu = tk.OptionMenu(self.filter_frame, cond_var, *self.condition_options(),
                                   command=lambda val, row=row_index: self.update_value_state(row))
         cond_menu.grid(row=row_index, column=col_offset+1, padx=5, pady=5)
         row_widgets["condition"] = cond_var
         row_widgets["condition_menu"] = cond_menu
         val_var = tk.StringVar(value="")
-        val_menu = tk.OptionMenu(self.filter_frame, val_var, "")
+        val_menu = ttk.Combobox(self.filter_frame, textvariable=val_var, values=[""])
         val_menu.grid(row=row_index, column=col_offset+2, padx=5, pady=5)
+        val_menu.bind("<KeyRelease>", lambda event, row=row_index: self.lookup_values(row))
         row_widgets["value"] = val_var
         row_widgets["value_menu"] = val_menu
+        # Free-text value used by the "contains" condition
+        text_var = tk.StringVar(value="")
+        text_entry = tk.Entry(self.filter_frame, textvariable=text_var)
+        text_entry.grid(row=row_index, column=col_offset+2, padx=5, pady=5)
+        text_entry.grid_remove()
+        row_widgets["text"] = text_var
+        row_widgets["text_entry"] = text_entry
         self.filter_rows.append(row_widgets)
-        self.update_value_options(row_index)
         self.update_value_state(row_index)
 
-    def update_value_options(self, row_index):
+    def fetch_values(self, row_index, prefix=""):
         t = translations[self.controller.lang]
         row_widgets = self.filter_rows[row_index]
-        selected_col = row_widgets["column"].get()
-        conn = sqlite3.connect("contacts.db")
-        cursor = conn.cursor()
         try:
-            query = f"SELECT DISTINCT {selected_col} FROM contacts"
-            cursor.execute(query)
-            results = cursor.fetchall()
-            options = sorted({str(r[0]) for r in results if r[0] not in (None, "")})
-            if not options:
-                options = [""]
+            if self.condition_code(row_widgets["condition"].get()) == "has_tag":
+                return tag_names(self.controller.db.reader(), prefix)
+            return facet_values(self.controller.db.reader(), row_widgets["column"].get(), prefix)
         except Exception as e:
             messagebox.showerror(t["error"], f"{t['error_fetch_values']}: {e}")
-            options = [""]
-        finally:
-            conn.close()
-        menu = row_widgets["value_menu"]["menu"]
-        menu.delete(0, "end")
-        for option in options:
-            menu.add_command(
-                label=option,
-                command=lambda value=option, var=row_widgets["value"]: var.set(value)
-            )
-        row_widgets["value"].set(options[0] if options else "")
+            return []
+
+    def update_value_options(self, row_index):
+        row_widgets = self.filter_rows[row_index]
+        options = self.fetch_values(row_index) or [""]
+        row_widgets["value_menu"].config(values=options)
+        row_widgets["value"].set(options[0])
+
+    def lookup_values(self, row_index):
+        # Type-ahead: values beyond the top list are found by prefix.
+        row_widgets = self.filter_rows[row_index]
+        prefix = row_widgets["value"].get()
+        row_widgets["value_menu"].config(values=self.fetch_values(row_index, prefix))
+
+    def condition_options(self):
+        t = translations[self.controller.lang]
+        return [t[code] for code in CONDITIONS]
+
+    def set_condition(self, row_index, option):
+        self.filter_rows[row_index]["condition"].set(option)
+        self.update_value_state(row_index)
 
     def update_value_state(self, row_index):
         row_widgets = self.filter_rows[row_index]
-        if row_widgets["condition"].get() == translations[self.controller.lang]["not_empty"]:
+        cond = self.condition_code(row_widgets["condition"].get())
+        if cond in TEXT_CONDITIONS:
+            row_widgets["value_menu"].grid_remove()
+            row_widgets["text_entry"].grid()
+            return
+        row_widgets["text_entry"].grid_remove()
+        row_widgets["value_menu"].grid()
+        if cond == "not_empty":
             row_widgets["value_menu"].config(state="disabled")
         else:
             row_widgets["value_menu"].config(state="normal")
+            # Tag conditions list tag names, the others the column's values.
+            self.update_value_options(row_index)
+
+    def condition_code(self, label):
+        t = translations[self.controller.lang]
+        return {t[code]: code for code in CONDITIONS}.get(label)
 
-    def build_query(self):
-        base_query = "SELECT id, full_name, phone, email, data_source, tags, country FROM contacts"
-        conditions = []
-        params = []
+    def filter_specs(self):
+        specs = []
         for row in self.filter_rows:
-            col = row["column"].get()
-            cond = row["condition"].get()
-            if cond == translations[self.controller.lang]["equals"]:
-                val = row["value"].get()
-                if val != "":
-                    conditions.append(f"{col} = ?")
-                    params.append(val)
-            elif cond == translations[self.controller.lang]["not_empty"]:
-                conditions.append(f"({col} IS NOT NULL AND {col} != '' AND lower({col}) != 'n/a' AND lower({col}) != 'nan')")
-        if not conditions:
-            return base_query, []
-        query = base_query + " WHERE " + conditions[0]
-        for i in range(1, len(conditions)):
-            op_var = self.filter_rows[i].get("operator")
-            op = op_var.get() if op_var else "AND"
-            query += f" {op} {conditions[i]}"
-        return query, params
+            cond = self.condition_code(row["condition"].get())
+            op_var = row.get("operator")
+            specs.append({
+                "column": row["column"].get(),
+                "condition": cond,
+                "value": row["text"].get() if cond in TEXT_CONDITIONS else row["value"].get(),
+                "operator": op_var.get() if op_var else "AND",
+            })
+        return specs
+
+    def build_query(self, columns=None, ranked=False):
+        return build_filter_query(self.filter_specs(), columns or self.columns, ranked)
 
     def search(self):
         t = translations[self.controller.lang]
-        query, params = self.build_query()
-        conn = sqlite3.connect("contacts.db")
-        cursor = conn.cursor()
+        if self.use_cache.get():
+            if self.cache.is_stale(self.controller.db.reader()):
+                self.refresh_cache(then=self.search_cache)
+            else:
+                self.search_cache()
+            return
+        query, params = self.build_query(ranked=True)
+        self.results.load_query(query, params, order=filter_order(self.filter_specs()),
+                                on_error=lambda e: messagebox.showerror(t["error"], f"{t['query_fail']}: {e}"))
+
+    def search_cache(self):
+        t = translations[self.controller.lang]
         try:
-            cursor.execute(query, params)
-            results = cursor.fetchall()
+            positions = self.cache.filter(self.filter_specs(), self.controller.db.reader())
         except Exception as e:
             messagebox.showerror(t["error"], f"{t['query_fail']}: {e}")
-            results = []
-        finally:
-            conn.close()
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        for row in results:
-            self.tree.insert("", "end", values=row)
+            return
+        self.results.load_frame(self.cache.frame, positions)
+
+    def toggle_cache(self):
+        if self.use_cache.get():
+            self.refresh_cache()
+        else:
+            self.cache.clear()
+            self.update_cache_label()
+
+    def refresh_cache(self, then=None):
+        # The copy is built on a worker thread with its own read connection and
+        # swapped in on the Tk thread once complete.
+        if self.cache_loading:
+            return
+        job = {"done": False, "error": None, "cache": None}
+        def run():
+            try:
+                conn = open_connection(self.controller.db.db_path, readonly=True)
+                try:
+                    cache = ContactCache()
+                    cache.load(conn)
+                    job["cache"] = cache
+                finally:
+                    conn.close()
+            except Exception as e:
+                job["error"] = e
+            job["done"] = True
+        self.cache_loading = True
+        self.update_cache_label()
+        threading.Thread(target=run, daemon=True).start()
+        self.after(100, lambda: self.finish_cache(job, then))
+
+    def finish_cache(self, job, then):
+        if not job["done"]:
+            self.after(100, lambda: self.finish_cache(job, then))
+            return
+        t = translations[self.controller.lang]
+        self.cache_loading = False
+        if job["error"] is not None:
+            self.use_cache.set(False)
+            self.update_cache_label()
+            messagebox.showerror(t["error"], f"{t['cache_fail']}: {job['error']}")
+            return
+        if self.use_cache.get():
+            self.cache = job["cache"]
+        self.update_cache_label()
+        if then is not None and self.use_cache.get():
+            then()
+
+    def update_cache_label(self):
+        t = translations[self.controller.lang]
+        if self.cache_loading:
+            self.cache_label.config(text=t["cache_loading"])
+        elif self.cache.frame is None:
+            self.cache_label.config(text="")
+        else:
+            self.cache_label.config(text=t["cache_usage"].format(
+                rows=len(self.cache.frame), size=self.cache.memory_bytes() / (1024 * 1024)))
 
     def load_all_contacts(self):
         t = translations[self.controller.lang]
-        query = "SELECT id, full_name, phone, email, data_source, tags, country FROM contacts"
-        conn = sqlite3.connect("contacts.db")
-        cursor = conn.cursor()
-        try:
-            cursor.execute(query)
-            results = cursor.fetchall()
-        except Exception as e:
-            messagebox.showerror(t["error"], f"{t['contacts_load_fail']}: {e}")
-            results = []
-        finally:
-            conn.close()
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        for row in results:
-            self.tree.insert("", "end", values=row)
+        query, params = build_filter_query([], self.columns)
+        self.results.load_query(query, params,
+                                on_error=lambda e: messagebox.showerror(t["error"], f"{t['contacts_load_fail']}: {e}"))
+
+    def update_row_status(self, start, end, total):
+        self.row_status = (start, end, total)
+        t = translations[self.controller.lang]
+        if total is None:
+            self.row_status_label.config(text=t["counting_rows"].format(start=start, end=end))
+        else:
+            self.row_status_label.config(text=t["showing_rows"].format(start=start, end=end, total=total))
 
     def export_csv(self):
         self.export_data("csv")
@@ -217,24 +302,44 @@ class FilterFrame(tk.Frame):
         if not selected_columns:
             messagebox.showerror(t["error"], t["no_columns_selected"])
             return
-        rows = []
-        for item in self.tree.get_children():
-            row = self.tree.item(item, "values")
-            rows.append(row)
-        df = pd.DataFrame(rows, columns=self.columns)
-        df = df[selected_columns]
         if filetype == "csv":
             file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV Files", "*.csv")])
-            if file_path:
-                df.to_csv(file_path, index=False)
-                messagebox.showinfo(t["success"], f"{t['data_exported_csv']} {file_path}")
-        elif filetype == "excel":
+        else:
             file_path = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel Files", "*.xlsx")])
-            if file_path:
-                df.to_excel(file_path, index=False)
-                messagebox.showinfo(t["success"], f"{t['data_exported_excel']} {file_path}")
+        if not file_path:
+            return
+        query, params = self.build_query(selected_columns)
+        # The export runs on a worker thread; the Tk thread polls for its result.
+        job = {"done": False, "error": None}
+        def run():
+            try:
+                export_query(query, params, selected_columns, file_path, filetype, db_path=self.controller.db.db_path)
+            except Exception as e:
+                job["error"] = e
+            job["done"] = True
+        self.set_export_state(tk.DISABLED)
+        threading.Thread(target=run, daemon=True).start()
+        self.after(100, lambda: self.finish_export(job, filetype, file_path))
+
+    def finish_export(self, job, filetype, file_path):
+        if not job["done"]:
+            self.after(100, lambda: self.finish_export(job, filetype, file_path))
+            return
+        t = translations[self.controller.lang]
+        self.set_export_state(tk.NORMAL)
+        if job["error"] is not None:
+            messagebox.showerror(t["error"], f"{t['export_fail']}: {job['error']}")
+        elif filetype == "csv":
+            messagebox.showinfo(t["success"], f"{t['data_exported_csv']} {file_path}")
+        else:
+            messagebox.showinfo(t["success"], f"{t['data_exported_excel']} {file_path}")
+
+    def set_export_state(self, state):
+        self.export_csv_button.config(state=state)
+        self.export_excel_button.config(state=state)
 
     def clear_filters(self):
+        self.results.cancel()
         for widget in self.filter_frame.winfo_children():
             widget.destroy()
         self.filter_rows = []
@@ -250,16 +355,18 @@ class FilterFrame(tk.Frame):
         self.export_csv_button.config(text=t["export_csv"])
         self.export_excel_button.config(text=t["export_excel"])
         self.back_button.config(text=t["back_main"])
+        self.cache_check.config(text=t["in_memory_filters"])
+        self.update_cache_label()
+        self.update_row_status(*self.row_status)
         # Also update each filter row's condition options:
-        for row in self.filter_rows:
-            cond_var = row.get("condition")
+        for index, row in enumerate(self.filter_rows):
             cond_menu = row.get("condition_menu")
             if cond_menu:
                 menu = cond_menu["menu"]
                 menu.delete(0, "end")
-                for option in [t["equals"], t["not_empty"]]:
-                    menu.add_command(label=option, command=lambda opt=option, var=cond_var: var.set(opt))
-                cond_var.set(t["equals"])
+                for option in self.condition_options():
+                    menu.add_command(label=option, command=lambda opt=option, row=index: self.set_condition(row, opt))
+                self.set_condition(index, t["equals"])
             else:
                 # If condition menu not saved, recreate it.
                 pass
@@ -0,0 +1,37 @@
+import re
+import unicodedata
+
+##############################################################################
+# Name folding and trigrams for fuzzy ("similar to") name search.
+# Names are folded to plain lowercase Latin first, so "Şükrü"/"Sukru" and
+# "Иван"/"Ivan" produce the same trigrams.
+##############################################################################
+CYRILLIC = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "e", "ж": "zh",
+    "з": "z", "и": "i", "й": "i", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o",
+    "п": "p", "р": "r", "с": "s", "т": "t", "у": "u", "ф": "f", "х": "kh", "ц": "ts",
+    "ч": "ch", "ш": "sh", "щ": "shch", "ъ": "", "ы": "y", "ь": "", "э": "e", "ю": "yu",
+    "я": "ya", "і": "i", "ї": "i", "є": "e", "ґ": "g",
+}
+
+FOLD = str.maketrans({"ı": "i", **CYRILLIC})
+
+NON_WORD = re.compile(r"[^a-z0-9]+")
+
+def fold_name(name):
+    text = str(name).lower().translate(FOLD)
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return NON_WORD.sub(" ", text).strip()
+
+def name_trigrams(name):
+    return folded_trigrams(fold_name(name))
+
+def folded_trigrams(folded):
+    # Word-level trigrams padded like pg_trgm, so word order does not matter.
+    trigrams = set()
+    for word in folded.split():
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            trigrams.add(padded[i:i + 3])
+    return trigrams
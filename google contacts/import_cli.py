@@ -0,0 +1,113 @@
+import argparse
+import multiprocessing
+import os
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor
+from database import DB_NAME, init_db, open_connection
+from importer import (CHUNK_SIZE, IMPORT_MODES, begin_load, build_contact_frame, end_load, iter_table,
+                      read_mapping, write_contacts)
+
+# Parsed chunks waiting for the writer; workers block once this many are queued.
+QUEUED_CHUNKS = 8
+
+# Seconds between checks for a worker that died without reporting its file.
+WORKER_POLL = 1.0
+
+##############################################################################
+# Headless import: parse/normalize files in a process pool, write from one
+# process. Usage:
+#   python import_cli.py --mapping mapping.json vendor1.csv vendor2.xlsx ...
+# The mapping file is the JSON written by "Save Column Mapping" in the app.
+# Workers stream each file in chunks through a bounded queue, so memory
+# follows chunk_size and the worker count, not the file size.
+##############################################################################
+chunk_queue = None
+
+def set_chunk_queue(results):
+    global chunk_queue
+    chunk_queue = results
+
+def prepare_file(number, file_path, mapping, chunk_size):
+    # Runs in a worker process: sends (number, "rows", frame) per chunk, then
+    # (number, "done", None) or (number, "error", message).
+    try:
+        for data in iter_table(file_path, chunk_size):
+            chunk_queue.put((number, "rows", build_contact_frame(data, mapping)))
+    except Exception as e:
+        chunk_queue.put((number, "error", str(e)))
+    else:
+        chunk_queue.put((number, "done", None))
+
+def import_files(file_paths, mapping, db_path=DB_NAME, workers=None, mode="append",
+                 chunk_size=CHUNK_SIZE, log=print):
+    started = time.perf_counter()
+    totals = {"files": 0, "failed": 0, "rows": 0, "inserted": 0, "updated": 0, "skipped": 0}
+    conn = open_connection(db_path)
+    try:
+        init_db(conn)
+        previous = begin_load(conn)
+        try:
+            results = multiprocessing.Queue(QUEUED_CHUNKS)
+            with ProcessPoolExecutor(max_workers=workers, initializer=set_chunk_queue,
+                                     initargs=(results,)) as pool:
+                futures = [pool.submit(prepare_file, number, path, mapping, chunk_size)
+                           for number, path in enumerate(file_paths)]
+                files = {number: {"rows": 0, "inserted": 0, "updated": 0, "skipped": 0}
+                         for number in range(len(file_paths))}
+                def finish(number, error):
+                    counts = files.pop(number)
+                    for name, count in counts.items():
+                        totals[name] += count
+                    if error is not None:
+                        totals["failed"] += 1
+                        log(f"{file_paths[number]}: failed to read after {counts['rows']} rows ({error})")
+                        return
+                    totals["files"] += 1
+                    log(f"{file_paths[number]}: {counts['rows']} rows, inserted {counts['inserted']}, "
+                        f"updated {counts['updated']}, skipped {counts['skipped']}")
+                while files:
+                    try:
+                        number, kind, payload = results.get(timeout=WORKER_POLL)
+                    except queue.Empty:
+                        # A crashed worker never reports; its future holds the error instead.
+                        for number in list(files):
+                            if futures[number].done() and futures[number].exception() is not None:
+                                finish(number, futures[number].exception())
+                        continue
+                    if number not in files:
+                        continue
+                    if kind == "rows":
+                        counts = files[number]
+                        for name, count in write_contacts(conn, payload, chunk_size, mode).items():
+                            counts[name] += count
+                        counts["rows"] += len(payload)
+                    else:
+                        finish(number, payload if kind == "error" else None)
+        finally:
+            end_load(conn, previous)
+    finally:
+        conn.close()
+    totals["seconds"] = time.perf_counter() - started
+    totals["rows_per_sec"] = totals["rows"] / totals["seconds"] if totals["seconds"] > 0 else 0.0
+    return totals
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import CSV/Excel contact files into contacts.db.")
+    parser.add_argument("files", nargs="+", help="CSV or Excel files to import")
+    parser.add_argument("--mapping", required=True, help="column mapping JSON saved from the app")
+    parser.add_argument("--db", default=DB_NAME, help="database file (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="parser processes")
+    parser.add_argument("--mode", choices=IMPORT_MODES, default="append",
+                        help="append every row, or upsert on phone/email")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="rows per transaction")
+    args = parser.parse_args(argv)
+    totals = import_files(args.files, read_mapping(args.mapping), args.db, args.workers,
+                          args.mode, args.chunk_size)
+    print(f"{totals['files']} files, {totals['rows']} rows in {totals['seconds']:.1f}s "
+          f"({totals['rows_per_sec']:.0f} rows/sec); inserted {totals['inserted']}, "
+          f"updated {totals['updated']}, skipped {totals['skipped']}, failed files {totals['failed']}")
+    return 1 if totals["failed"] else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,356 @@
+import json
+import time
+from functools import reduce
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+from openpyxl import load_workbook # type: ignore
+from database import (DB_NAME, E164_COLUMNS, FACET_COLUMNS, init_db, open_connection, add_facet_counts,
+                      bump_version, suspend_fts_trigger, resume_fts_trigger, EMPTY_TOKENS, split_tokens, link_tags, index_names)
+from phone_numbers import normalize_phone_series
+
+CHUNK_SIZE = 10000
+
+# Cell texts pandas reads as missing by default; streamed sheets treat them the same.
+NA_STRINGS = {"", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+              "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"}
+
+# Rows read for the column-mapping preview; the whole file is only read by the import.
+PREVIEW_ROWS = 100
+
+CONTACT_COLUMNS = ["full_name", "phone", "email", "data_source", "tags", "country", "identity_key",
+                   "dial_code", "national_number", "country_code"]
+
+INSERT_CONTACT = """
+    INSERT INTO contacts (full_name, phone, email, data_source, tags, country, identity_key,
+                          dial_code, national_number, country_code)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Import modes: "append" adds every row, "upsert" merges rows sharing an identity key.
+IMPORT_MODES = ("append", "upsert")
+
+# Comma-separated fields merged on upsert.
+MERGED_COLUMNS = ["data_source", "tags"]
+
+##############################################################################
+# Reading uploaded files and saved column mappings
+##############################################################################
+# Files are streamed in chunks of rows, so memory stays bounded by the chunk
+# size rather than the file size. CSV cells are read as text, so every chunk
+# parses the same way (and phone numbers keep their leading zeros).
+def sheet_columns(header):
+    # Blank and repeated headers are named the way pandas.read_excel names them.
+    columns = []
+    for i, name in enumerate(header):
+        name = f"Unnamed: {i}" if name is None else str(name)
+        base, n = name, 0
+        while name in columns:
+            n += 1
+            name = f"{base}.{n}"
+        columns.append(name)
+    return columns
+
+def sheet_frame(rows, columns):
+    # Whole-number floats become ints and empty cells NaN, as with pandas.read_excel.
+    width = len(columns)
+    rows = [tuple(cell_value(value) for value in row[:width]) + (None,) * (width - len(row)) for row in rows]
+    return pd.DataFrame(rows, columns=columns, dtype=object).fillna(np.nan)
+
+def cell_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str) and value in NA_STRINGS:
+        return None
+    return value
+
+def xlsx_chunks(file_path, chunk_size, max_rows=None):
+    # Read-only openpyxl iterates the first sheet's rows without loading the workbook.
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = sheet_columns(header)
+        batch = []
+        empty = True
+        for count, row in enumerate(rows):
+            if max_rows is not None and count >= max_rows:
+                break
+            batch.append(row)
+            if len(batch) == chunk_size:
+                yield sheet_frame(batch, columns)
+                batch = []
+                empty = False
+        if batch or empty:
+            yield sheet_frame(batch, columns)
+    finally:
+        workbook.close()
+
+def iter_table(file_path, chunk_size=CHUNK_SIZE):
+    path = file_path.lower()
+    if path.endswith('.csv'):
+        yield from pd.read_csv(file_path, dtype=str, chunksize=chunk_size)
+    elif path.endswith(('.xlsx', '.xlsm')):
+        yield from xlsx_chunks(file_path, chunk_size)
+    else:
+        # Legacy .xls has no streaming reader; it is read whole and handed out in chunks.
+        data = pd.read_excel(file_path)
+        for start in range(0, len(data), chunk_size):
+            yield data.iloc[start:start + chunk_size]
+
+def read_preview(file_path, rows=PREVIEW_ROWS):
+    # Header plus the first rows, for mapping columns.
+    path = file_path.lower()
+    if path.endswith('.csv'):
+        return pd.read_csv(file_path, dtype=str, nrows=rows)
+    if path.endswith(('.xlsx', '.xlsm')):
+        return next(xlsx_chunks(file_path, rows, max_rows=rows))
+    return pd.read_excel(file_path, nrows=rows)
+
+def write_mapping(mapping, file_path):
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump(mapping, f, ensure_ascii=False, indent=2)
+
+def read_mapping(file_path):
+    with open(file_path, encoding="utf-8") as f:
+        return json.load(f)
+
+##############################################################################
+# Column mapping: turn an uploaded DataFrame into contacts rows in bulk
+##############################################################################
+# mapping = {
+#     "full_name": [col, ...],            # up to three source columns, joined by spaces
+#     "phone": col or None,
+#     "email": col or None,
+#     "data_source": col or None, "fixed_data_source": str,
+#     "tags": col or None, "fixed_tags": str,
+# }
+def as_text(series):
+    # Same result as str(value) per cell, without a Python loop over rows.
+    return pd.Series(series.to_numpy(dtype=object).astype(str), index=series.index, dtype=object)
+
+def constant(data, value):
+    return pd.Series(value, index=data.index, dtype=object)
+
+def mapped_or_fixed(data, col, fixed):
+    if col:
+        return as_text(data[col])
+    return constant(data, (fixed or "").strip())
+
+def normalize_phones(raw):
+    # Each distinct number is normalized once and broadcast back to every row.
+    raw = as_text(raw).str.strip()
+    uniques = pd.Series(pd.unique(raw), dtype=object)
+    processed = normalize_phone_series(uniques)
+    rows = processed.iloc[pd.Index(uniques).get_indexer(raw)].set_index(raw.index)
+    return rows.rename(columns={"cleaned": "phone"})
+
+def build_contact_frame(data, mapping):
+    name_cols = [col for col in mapping.get("full_name", []) if col]
+    if name_cols:
+        full_name = as_text(data[name_cols[0]])
+        for col in name_cols[1:]:
+            full_name = full_name + " " + as_text(data[col])
+    else:
+        full_name = constant(data, "")
+    phone_col = mapping.get("phone")
+    if phone_col:
+        phones = normalize_phones(data[phone_col])
+    else:
+        phones = pd.DataFrame({"phone": constant(data, ""), "country": constant(data, "")})
+        for col in E164_COLUMNS:
+            phones[col] = constant(data, None)
+    phone = phones["phone"]
+    email_col = mapping.get("email")
+    email = as_text(data[email_col]) if email_col else constant(data, "")
+    data_source = mapped_or_fixed(data, mapping.get("data_source"), mapping.get("fixed_data_source"))
+    tags = mapped_or_fixed(data, mapping.get("tags"), mapping.get("fixed_tags"))
+    return pd.DataFrame({
+        "full_name": full_name,
+        "phone": phone,
+        "email": email,
+        "data_source": data_source,
+        "tags": tags,
+        "country": phones["country"],
+        "identity_key": identity_keys(phone, email),
+        **{col: phones[col] for col in E164_COLUMNS},
+    }, columns=CONTACT_COLUMNS)
+
+##############################################################################
+# Identity keys and field merging for deduplicating imports
+##############################################################################
+def identity_keys(phone, email):
+    # E.164 phone when the number could be normalized, otherwise the email address.
+    email = email.str.strip().str.lower()
+    keys = pd.Series(None, index=phone.index, dtype=object)
+    has_email = email.str.contains("@", regex=False)
+    keys[has_email] = "e:" + email[has_email]
+    has_phone = phone.str.startswith("+")
+    keys[has_phone] = "p:" + phone[has_phone]
+    return keys
+
+def merge_field(old, new):
+    known = split_tokens(old)
+    added = [token for token in split_tokens(new) if token not in known]
+    if not added:
+        return old
+    return ", ".join(known + added)
+
+##############################################################################
+# Bulk writer: chunked executemany inside explicit transactions
+##############################################################################
+def begin_load(conn):
+    previous = conn.execute("PRAGMA synchronous").fetchone()[0]
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return previous
+
+def end_load(conn, previous):
+    conn.execute(f"PRAGMA synchronous={int(previous)}")
+
+def record_facets(conn, chunk):
+    for col in FACET_COLUMNS:
+        counts = chunk[col][chunk[col] != ""].value_counts()
+        add_facet_counts(conn, col, counts.items())
+
+def record_tags(conn, contact_ids, tags):
+    # Explode the comma-separated tags into (contact_id, tag) pairs in one pass.
+    pairs = pd.DataFrame({"contact_id": list(contact_ids), "tag": tags.to_numpy()})
+    pairs["tag"] = pairs["tag"].str.split(",")
+    pairs = pairs.explode("tag")
+    pairs["tag"] = pairs["tag"].str.strip()
+    pairs = pairs[pairs["tag"].notna() & ~pairs["tag"].str.lower().isin(EMPTY_TOKENS)]
+    link_tags(conn, pairs.itertuples(index=False, name=None))
+
+def sql_rows(rows):
+    # Nullable Int64 columns bind as Python ints, and missing values as NULL.
+    ints = {col: rows[col].astype(object).where(rows[col].notna(), None)
+            for col in ["dial_code", "national_number"]}
+    return rows.assign(**ints).itertuples(index=False, name=None)
+
+def insert_rows(conn, rows):
+    last_id = suspend_fts_trigger(conn)
+    conn.executemany(INSERT_CONTACT, sql_rows(rows))
+    resume_fts_trigger(conn, last_id)
+    record_facets(conn, rows)
+    # Ids come back in insertion order, so they line up with the rows.
+    ids = [row[0] for row in conn.execute("SELECT id FROM contacts WHERE id > ? ORDER BY id", (last_id,))]
+    record_tags(conn, ids, rows["tags"])
+    index_names(conn, zip(ids, rows["full_name"]))
+
+def append_chunk(conn, chunk):
+    # Every row is added. A row keeps its identity key when no stored contact and
+    # no earlier row in the batch has it, so a later upsert can still match it.
+    keys = chunk["identity_key"]
+    existing = existing_contacts(conn, keys[keys.notna()].drop_duplicates())
+    taken = keys.duplicated() | keys.isin(existing["identity_key"])
+    insert_rows(conn, chunk.assign(identity_key=keys.where(~taken, None)))
+    return {"inserted": len(chunk), "updated": 0, "skipped": 0}
+
+def collapse_repeats(keyed):
+    # Rows repeating a key within the batch fold into its first occurrence.
+    first = keyed.drop_duplicates("identity_key").copy()
+    repeats = keyed[keyed["identity_key"].duplicated(keep=False)]
+    if len(repeats):
+        grouped = repeats.groupby("identity_key", sort=False)
+        for col in MERGED_COLUMNS:
+            combined = grouped[col].agg(lambda values: reduce(merge_field, values))
+            hit = first["identity_key"].isin(combined.index)
+            first.loc[hit, col] = first.loc[hit, "identity_key"].map(combined)
+    return first
+
+def existing_contacts(conn, keys):
+    # One join against the unique index for the whole batch.
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS import_keys (identity_key TEXT PRIMARY KEY)")
+    conn.execute("DELETE FROM import_keys")
+    conn.executemany("INSERT INTO import_keys (identity_key) VALUES (?)", ((key,) for key in keys))
+    rows = conn.execute(f"""
+        SELECT c.identity_key, c.id, {", ".join("c." + col for col in MERGED_COLUMNS)}
+        FROM import_keys k JOIN contacts c ON c.identity_key = k.identity_key
+    """).fetchall()
+    return pd.DataFrame(rows, columns=["identity_key", "id"] + MERGED_COLUMNS)
+
+def upsert_chunk(conn, chunk):
+    keyed = chunk[chunk["identity_key"].notna()]
+    first = collapse_repeats(keyed)
+    existing = existing_contacts(conn, first["identity_key"])
+    is_new = ~first["identity_key"].isin(existing["identity_key"])
+    inserts = pd.concat([chunk[chunk["identity_key"].isna()], first[is_new]]).sort_index()
+    insert_rows(conn, inserts)
+    matched = first[~is_new].merge(existing, on="identity_key", suffixes=("", "_old"))
+    changed = pd.Series(False, index=matched.index)
+    for col in MERGED_COLUMNS:
+        merged = [merge_field(old, new) for old, new in zip(matched[col + "_old"], matched[col])]
+        matched[col] = merged
+        changed |= matched[col] != matched[col + "_old"]
+    updates = matched[changed]
+    if len(updates):
+        conn.executemany(
+            f"UPDATE contacts SET {', '.join(col + ' = ?' for col in MERGED_COLUMNS)} WHERE id = ?",
+            updates[MERGED_COLUMNS + ["id"]].itertuples(index=False, name=None))
+        for col in MERGED_COLUMNS:
+            if col in FACET_COLUMNS:
+                removed = updates[col + "_old"][updates[col + "_old"] != ""].value_counts()
+                added = updates[col][updates[col] != ""].value_counts()
+                add_facet_counts(conn, col, added.sub(removed, fill_value=0).astype(int).items())
+        record_tags(conn, updates["id"], updates["tags"])
+    return {
+        "inserted": len(inserts),
+        "updated": len(updates),
+        "skipped": len(matched) - len(updates) + len(keyed) - len(first),
+    }
+
+def write_contacts(conn, frame, chunk_size=CHUNK_SIZE, mode="append"):
+    write_chunk = upsert_chunk if mode == "upsert" else append_chunk
+    totals = {"inserted": 0, "updated": 0, "skipped": 0}
+    for start in range(0, len(frame), chunk_size):
+        chunk = frame.iloc[start:start + chunk_size]
+        conn.execute("BEGIN")
+        try:
+            counts = write_chunk(conn, chunk)
+            bump_version(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        for name, count in counts.items():
+            totals[name] += count
+    return totals
+
+def import_chunks(chunks, mapping, db_path=DB_NAME, chunk_size=CHUNK_SIZE, mode="append", conn=None):
+    # chunks: DataFrames of source rows. Each one is mapped and written before
+    # the next is read. Pass conn (e.g. ConnectionManager.writer()) to reuse an
+    # open connection.
+    if mode not in IMPORT_MODES:
+        raise ValueError(f"Unknown import mode: {mode}")
+    started = time.perf_counter()
+    counts = {"inserted": 0, "updated": 0, "skipped": 0}
+    rows = 0
+    own_conn = conn is None
+    if own_conn:
+        conn = open_connection(db_path)
+    try:
+        init_db(conn)
+        previous = begin_load(conn)
+        try:
+            for data in chunks:
+                frame = build_contact_frame(data, mapping)
+                for name, count in write_contacts(conn, frame, chunk_size, mode).items():
+                    counts[name] += count
+                rows += len(frame)
+        finally:
+            end_load(conn, previous)
+    finally:
+        if own_conn:
+            conn.close()
+    seconds = time.perf_counter() - started
+    rows_per_sec = rows / seconds if seconds > 0 else 0.0
+    return dict(counts, rows=rows, seconds=seconds, rows_per_sec=rows_per_sec)
+
+def bulk_import(data, mapping, db_path=DB_NAME, chunk_size=CHUNK_SIZE, mode="append", conn=None):
+    return import_chunks([data], mapping, db_path, chunk_size, mode, conn)
+
+def import_file(file_path, mapping, db_path=DB_NAME, chunk_size=CHUNK_SIZE, mode="append", conn=None):
+    # Streams the file, so peak memory follows chunk_size rather than the file size.
+    return import_chunks(iter_table(file_path, chunk_size), mapping, db_path, chunk_size, mode, conn)
@@ -1,7 +1,9 @@
 import tkinter as tk
+from database import ConnectionManager
 from utility import center_window
 from contacts import ContactsFrame
 from filters import FilterFrame
+from duplicates import DuplicatesFrame
 from main_menu import MainMenuFrame
 
 ##############################################################################
@@ -13,8 +15,11 @@ class MainApp:
         self.lang = "en"  # default language
         self.root.title("Contacts Application")
         self.root.geometry("700x400")
+        self.db = ConnectionManager()
+        self.db.writer()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self.frames = {}
-        for F in (MainMenuFrame, ContactsFrame, FilterFrame):
+        for F in (MainMenuFrame, ContactsFrame, FilterFrame, DuplicatesFrame):
             page_name = F.__name__
             frame = F(self.root, self)
             self.frames[page_name] = frame
@@ -27,6 +32,11 @@ class MainApp:
         frame.tkraise()
         frame.update_texts()
 
+    def on_close(self):
+        self.frames["FilterFrame"].results.close()
+        self.db.close()
+        self.root.destroy()
+
     def set_language(self, lang):
         self.lang = lang
         # Update texts on all frames
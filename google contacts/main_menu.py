@@ -26,6 +26,8 @@ class MainMenuFrame(tk.Frame):
         self.upload_button.pack(pady=10)
         self.filter_button = tk.Button(self, command=lambda: controller.show_frame("FilterFrame"))
         self.filter_button.pack(pady=10)
+        self.duplicates_button = tk.Button(self, command=lambda: controller.show_frame("DuplicatesFrame"))
+        self.duplicates_button.pack(pady=10)
 
     def change_language(self, selection):
         # Map the displayed language to its code.
@@ -40,3 +42,4 @@ class MainMenuFrame(tk.Frame):
         # (You may need additional handling if you want the menu items to update)
         self.upload_button.config(text=t["upload_data"])
         self.filter_button.config(text=t["extract_data"])
+        self.duplicates_button.config(text=t["duplicates"])
@@ -1,147 +1,310 @@
 import re
+import numpy as np # type: ignore
+import pandas as pd # type: ignore
+
+##############################################################################
+# Phone rule table: (digit length, prefix, digits to drop, dial prefix, country)
+# A matching number becomes "+" + dial prefix + sanitized[drop:].
+# When several prefixes match, the longest one wins.
+##############################################################################
+PHONE_RULES = [
+    (10, "5", 0, "90", "Turkey"),
+    (11, "05", 1, "9", "Turkey"),
+    (12, "90", 0, "", "Turkey"),
+    (10, "85", 0, "90", "Turkey"),
+    (12, "9085", 0, "", "Turkey"),
+    (11, "79", 0, "", "Russia"),
+    (11, "89", 2, "79", "Russia"),
+    (11, "84", 2, "74", "Russia"),
+    (11, "88", 2, "78", "Russia"),
+    (11, "87", 2, "77", "Kazakhstan"),
+    (11, "77", 2, "77", "Kazakhstan"),
+    (11, "99", 0, "352", "Luxembourg"),
+    (11, "49", 0, "352", "Luxembourg"),
+    (14, "352", 0, "", "Luxembourg"),
+    (11, "98", 0, "62", "Indonesia"),
+    (11, "243", 0, "62", "Indonesia"),
+    (11, "240", 0, "62", "Indonesia"),
+    (13, "62", 0, "", "Indonesia"),
+    (11, "97", 0, "49", "Germany"),
+    (13, "4997", 0, "", "Germany"),
+    (11, "6", 0, "49", "Germany"),
+    (10, "775", 0, "1", "US"),
+    (10, "212", 0, "1", "US"),
+    (11, "131", 0, "", "US"),
+    (8, "185", 0, "46", "Sweden"),
+    (11, "100", 0, "886", "Taiwan"),
+    (12, "998", 0, "", "Uzbekistan"),
+    (12, "996", 0, "", "Kyrgyzstan"),
+    (12, "992", 0, "", "Tajikistan"),
+    (12, "375", 0, "", "Belarus"),
+    (12, "972", 0, "", "Israel"),
+    (12, "380", 0, "", "Ukraine"),
+    (12, "994", 0, "", "Azerbaijan"),
+    (11, "372", 0, "", "Estonia"),
+    (11, "373", 0, "", "Moldova"),
+    (11, "27", 0, "", "South Africa"),
+    (13, "49", 0, "", "Germany"),
+    (11, "1", 0, "", "USA"),
+    (12, "57", 0, "", "Colombia"),
+    (11, "33", 0, "", "France"),
+    (12, "39", 0, "", "Italy"),
+    (11, "36", 0, "", "Hungary"),
+    (11, "34", 0, "", "Spain"),
+    (11, "31", 0, "", "Netherlands"),
+    (12, "82", 0, "", "Korea, South"),
+]
+
+NON_DIGIT = re.compile(r'\D')
+
+# Country -> (ISO 3166 alpha-2 code, E.164 dial code) for every country in PHONE_RULES.
+COUNTRY_CODES = {
+    "Turkey": ("TR", 90),
+    "Russia": ("RU", 7),
+    "Kazakhstan": ("KZ", 7),
+    "Luxembourg": ("LU", 352),
+    "Indonesia": ("ID", 62),
+    "Germany": ("DE", 49),
+    "US": ("US", 1),
+    "USA": ("US", 1),
+    "Sweden": ("SE", 46),
+    "Taiwan": ("TW", 886),
+    "Uzbekistan": ("UZ", 998),
+    "Kyrgyzstan": ("KG", 996),
+    "Tajikistan": ("TJ", 992),
+    "Belarus": ("BY", 375),
+    "Israel": ("IL", 972),
+    "Ukraine": ("UA", 380),
+    "Azerbaijan": ("AZ", 994),
+    "Estonia": ("EE", 372),
+    "Moldova": ("MD", 373),
+    "South Africa": ("ZA", 27),
+    "Colombia": ("CO", 57),
+    "France": ("FR", 33),
+    "Italy": ("IT", 39),
+    "Hungary": ("HU", 36),
+    "Spain": ("ES", 34),
+    "Netherlands": ("NL", 31),
+    "Korea, South": ("KR", 82),
+}
+
+DIAL_CODES = sorted({dial for _, dial in COUNTRY_CODES.values()})
+
+# E.164 numbers have at most 15 digits, dial code included.
+MAX_E164_DIGITS = 15
+
+# Longer phone texts skip the character-matrix path in normalize_phone_series.
+MAX_PHONE_TEXT = 40
+
+
+def compile_rules(rules):
+    # {length: {prefix: (drop, dial, country)}}
+    table = {}
+    for length, prefix, drop, dial, country in rules:
+        if not prefix.isdigit() or len(prefix) > length:
+            raise ValueError(f"Bad phone rule prefix {prefix!r} for {length} digits")
+        table.setdefault(length, {}).setdefault(prefix, (drop, dial, country))
+    max_prefix = max((len(rule[1]) for rule in rules), default=0)
+    # rule_key must fit in int64 for every digit count the matrix path sees.
+    if rule_key(MAX_PHONE_TEXT, max_prefix, 10 ** max_prefix - 1, max_prefix) >= 2 ** 63:
+        raise ValueError(f"Phone rule prefixes of {max_prefix} digits are too long")
+    return table, max_prefix
+
+def rule_key(length, size, value, max_prefix):
+    # One integer per (digit length, prefix size, prefix value). Each field gets
+    # its own range sized from the longest prefix, so no two rules share a key.
+    return (length * (max_prefix + 1) + size) * 10 ** max_prefix + value
+
+RULE_TABLE, MAX_PREFIX = compile_rules(PHONE_RULES)
+
+def match_rule(sanitized):
+    by_prefix = RULE_TABLE.get(len(sanitized))
+    if by_prefix:
+        for size in range(min(MAX_PREFIX, len(sanitized)), 0, -1):
+            rule = by_prefix.get(sanitized[:size])
+            if rule:
+                return rule
+    return None
 
 ##############################################################################
 # Shared helper: phone number processing
 ##############################################################################
 def process_phone_number(phone):
     original = phone.strip()
-    sanitized = re.sub(r'\D', '', phone)
-    cleaned = ""
-    country = ""
-    if sanitized:
-        if len(sanitized) == 10 and sanitized.startswith("5"):
-            cleaned = f"+90{sanitized}"
-            country = "Turkey"
-        elif len(sanitized) == 11 and sanitized.startswith("05"):
-            cleaned = f"+9{sanitized[1:]}"
-            country = "Turkey"
-        elif len(sanitized) == 12 and sanitized.startswith("90"):
-            cleaned = f"+{sanitized}"
-            country = "Turkey"
-        elif len(sanitized) == 10 and sanitized.startswith("85"):
-            cleaned = f"+90{sanitized}"
-            country = "Turkey"
-        elif len(sanitized) == 12 and sanitized.startswith("9085"):
-            cleaned = f"+{sanitized}"
-            country = "Turkey"
-        elif len(sanitized) == 11 and sanitized.startswith("79"):
-            cleaned = f"+{sanitized}"
-            country = "Russia"
-        elif len(sanitized) == 11 and sanitized.startswith("89"):
-            cleaned = f"+79{sanitized[2:]}"
-            country = "Russia"
-        elif len(sanitized) == 11 and sanitized.startswith("84"):
-            cleaned = f"+74{sanitized[2:]}"
-            country = "Russia"
-        elif len(sanitized) == 11 and sanitized.startswith("88"):
-            cleaned = f"+78{sanitized[2:]}"
-            country = "Russia"
-        elif len(sanitized) == 11 and sanitized.startswith("87"):
-            cleaned = f"+77{sanitized[2:]}"
-            country = "Kazakhstan"
-        elif len(sanitized) == 11 and sanitized.startswith("77"):
-            cleaned = f"+77{sanitized[2:]}"
-            country = "Kazakhstan"
-        elif len(sanitized) == 11 and (sanitized.startswith("99") or sanitized.startswith("49")):
-            cleaned = f"+352{sanitized}"
-            country = "Luxembourg"
-        elif len(sanitized) == 14 and sanitized.startswith("352"):
-            cleaned = f"+{sanitized}"
-            country = "Luxembourg"
-        elif len(sanitized) == 11 and (sanitized.startswith("98") or sanitized.startswith("243") or sanitized.startswith("240")):
-            cleaned = f"+62{sanitized}"
-            country = "Indonesia"
-        elif len(sanitized) == 13 and sanitized.startswith("62"):
-            cleaned = f"+{sanitized}"
-            country = "Indonesia"
-        elif len(sanitized) == 11 and sanitized.startswith("97"):
-            cleaned = f"+49{sanitized}"
-            country = "Germany"
-        elif len(sanitized) == 13 and sanitized.startswith("4997"):
-            cleaned = f"+{sanitized}"
-            country = "Germany"
-        elif len(sanitized) == 11 and sanitized.startswith("6"):
-            cleaned = f"+49{sanitized}"
-            country = "Germany"
-        elif len(sanitized) == 10 and sanitized.startswith("775"):
-            cleaned = f"+1{sanitized}"
-            country = "US"
-        elif len(sanitized) == 10 and sanitized.startswith("212"):
-            cleaned = f"+1{sanitized}"
-            country = "US"
-        elif len(sanitized) == 11 and sanitized.startswith("131"):
-            cleaned = f"+{sanitized}"
-            country = "US"
-        elif len(sanitized) == 8 and sanitized.startswith("185"):
-            cleaned = f"+46{sanitized}"
-            country = "Sweden"
-        elif len(sanitized) == 11 and sanitized.startswith("100"):
-            cleaned = f"+886{sanitized}"
-            country = "Taiwan"
-        elif len(sanitized) == 12 and sanitized.startswith("998"):
-            cleaned = f"+{sanitized}"
-            country = "Uzbekistan"
-        elif len(sanitized) == 12 and sanitized.startswith("996"):
-            cleaned = f"+{sanitized}"
-            country = "Kyrgyzstan"
-        elif len(sanitized) == 12 and sanitized.startswith("992"):
-            cleaned = f"+{sanitized}"
-            country = "Tajikistan"
-        elif len(sanitized) == 12 and sanitized.startswith("375"):
-            cleaned = f"+{sanitized}"
-            country = "Belarus"
-        elif len(sanitized) == 12 and sanitized.startswith("972"):
-            cleaned = f"+{sanitized}"
-            country = "Israel"
-        elif len(sanitized) == 12 and sanitized.startswith("380"):
-            cleaned = f"+{sanitized}"
-            country = "Ukraine"
-        elif len(sanitized) == 12 and sanitized.startswith("994"):
-            cleaned = f"+{sanitized}"
-            country = "Azerbaijan"
-        elif len(sanitized) == 11 and sanitized.startswith("372"):
-            cleaned = f"+{sanitized}"
-            country = "Estonia"
-        elif len(sanitized) == 11 and sanitized.startswith("373"):
-            cleaned = f"+{sanitized}"
-            country = "Moldova"
-        elif len(sanitized) == 11 and sanitized.startswith("27"):
-            cleaned = f"+{sanitized}"
-            country = "South Africa"
-        elif len(sanitized) == 13 and sanitized.startswith("49"):
-            cleaned = f"+{sanitized}"
-            country = "Germany"
-        elif len(sanitized) == 11 and sanitized.startswith("1"):
-            cleaned = f"+{sanitized}"
-            country = "USA"
-        elif len(sanitized) == 12 and sanitized.startswith("57"):
-            cleaned = f"+{sanitized}"
-            country = "Colombia"
-        elif len(sanitized) == 11 and sanitized.startswith("33"):
-            cleaned = f"+{sanitized}"
-            country = "France"
-        elif len(sanitized) == 12 and sanitized.startswith("39"):
-            cleaned = f"+{sanitized}"
-            country = "Italy"
-        elif len(sanitized) == 11 and sanitized.startswith("36"):
-            cleaned = f"+{sanitized}"
-            country = "Hungary"
-        elif len(sanitized) == 11 and sanitized.startswith("34"):
-            cleaned = f"+{sanitized}"
-            country = "Spain"
-        elif len(sanitized) == 11 and sanitized.startswith("31"):
-            cleaned = f"+{sanitized}"
-            country = "Netherlands"
-        elif len(sanitized) == 12 and sanitized.startswith("82"):
-            cleaned = f"+{sanitized}"
-            country = "Korea, South"
-        elif phone.startswith("+"):
-            cleaned = sanitized
-            country = "Unknown"
-        else:
-            cleaned = original
-            country = "N/A"
+    sanitized = NON_DIGIT.sub('', phone)
+    if not sanitized:
+        return {"original": original, "cleaned": "", "country": ""}
+    rule = match_rule(sanitized)
+    if rule:
+        drop, dial, country = rule
+        cleaned = f"+{dial}{sanitized[drop:]}"
+    elif phone.startswith("+"):
+        cleaned = sanitized
+        country = "Unknown"
     else:
-        cleaned = ""
-        country = ""
+        cleaned = original
+        country = "N/A"
     return {"original": original, "cleaned": cleaned, "country": country}
+
+##############################################################################
+# Column-wide variant: same results as process_phone_number, one row per value.
+# Numbers are held as a matrix of character codes (one row each), so finding
+# digits, matching rules and building the E.164 text are numpy operations.
+# Longer texts, and non-ASCII digits that \\D also keeps, use the scalar path.
+##############################################################################
+def rule_e164(length, prefix, drop, dial, country):
+    # E.164 parts a rule produces: (dial code, ISO code, national digits taken from
+    # the dial prefix, position the rest starts at in the sanitized number, length).
+    # None when the rule's output never starts with its country's dial code.
+    codes = COUNTRY_CODES.get(country)
+    if not codes:
+        return None
+    iso, dial_code = codes
+    code = str(dial_code)
+    if not (dial + prefix[drop:]).startswith(code):
+        return None
+    start = drop + max(0, len(code) - len(dial))
+    return dial_code, iso, dial[len(code):], start, length
+
+def rule_codes(table):
+    # Each (length, prefix) as its sortable rule_key. RULE_LIST follows the same
+    # order as (drop, dial, country, E.164 parts or None).
+    codes = []
+    rules = []
+    for length, by_prefix in table.items():
+        for prefix, rule in by_prefix.items():
+            codes.append(rule_key(length, len(prefix), int(prefix), MAX_PREFIX))
+            rules.append(rule + (rule_e164(length, prefix, *rule),))
+    order = np.argsort(codes)
+    return np.array(codes, dtype=np.int64)[order], [rules[i] for i in order]
+
+RULE_CODES, RULE_LIST = rule_codes(RULE_TABLE)
+PREFIX_SIZES = sorted({len(prefix) for by_prefix in RULE_TABLE.values() for prefix in by_prefix}, reverse=True)
+RULE_DIALS = np.array(["+" + rule[1] for rule in RULE_LIST])
+RULE_DROPS = np.array([rule[0] for rule in RULE_LIST])
+RULE_COUNTRIES = np.array([rule[2] for rule in RULE_LIST], dtype=object)
+
+def digit_matrix(text):
+    # text: <U array -> (digits moved to the front of each row and zero-padded, digit counts)
+    width = max(text.dtype.itemsize // 4, 1)
+    codes = text.view(np.uint32).reshape(len(text), width)
+    is_digit = (codes >= 48) & (codes <= 57)
+    counts = is_digit.sum(axis=1)
+    digits = np.take_along_axis(codes, np.argsort(~is_digit, axis=1, kind="stable"), axis=1)
+    digits[np.arange(width) >= counts[:, None]] = 0
+    return digits, counts
+
+def match_rule_ids(digits, counts):
+    # Position in RULE_LIST per row, -1 when no rule matches; longest prefix first.
+    rule_ids = np.full(len(digits), -1)
+    for size in PREFIX_SIZES:
+        if size > digits.shape[1]:
+            continue
+        value = ((digits[:, :size].astype(np.int64) - 48) * 10 ** np.arange(size - 1, -1, -1)).sum(axis=1)
+        code = rule_key(counts.astype(np.int64), size, value, MAX_PREFIX)
+        found = np.searchsorted(RULE_CODES, code).clip(0, len(RULE_CODES) - 1)
+        hit = (RULE_CODES[found] == code) & (rule_ids < 0)
+        rule_ids[hit] = found[hit]
+    return rule_ids
+
+def as_strings(digits, start=0):
+    # Columns start: of a code matrix back to a <U array (zero padding drops off).
+    width = digits.shape[1] - start
+    if width <= 0:
+        return np.full(len(digits), "")
+    return np.ascontiguousarray(digits[:, start:]).view(f"U{width}").ravel()
+
+def e164_matrix(digits, rule_ids):
+    # e164_parts per row from the matched rule and the digit matrix:
+    # (dial codes, national numbers, ISO codes, rows that have them).
+    dial_codes = np.zeros(len(digits), dtype=np.int64)
+    national = np.zeros(len(digits), dtype=np.int64)
+    iso = np.full(len(digits), None, dtype=object)
+    known = np.zeros(len(digits), dtype=bool)
+    for rule_id in np.unique(rule_ids[rule_ids >= 0]):
+        parts = RULE_LIST[rule_id][3]
+        if parts is None:
+            continue
+        dial_code, code, head, start, length = parts
+        if not head and start >= length:
+            continue
+        rows = np.flatnonzero(rule_ids == rule_id)
+        tail = digits[rows, start:length].astype(np.int64) - 48
+        national[rows] = (int(head or 0) * 10 ** (length - start)
+                          + (tail * 10 ** np.arange(length - start - 1, -1, -1)).sum(axis=1))
+        dial_codes[rows] = dial_code
+        iso[rows] = code
+        known[rows] = True
+    return dial_codes, national, iso, known
+
+def normalize_matrix(values):
+    # (original, cleaned, country, dial codes, national numbers, ISO codes, rows with E.164 parts)
+    text = values.astype(str)
+    digits, counts = digit_matrix(text)
+    rule_ids = match_rule_ids(digits, counts)
+    matched = rule_ids >= 0
+    original = np.char.strip(text).astype(object)
+    cleaned = original.copy()
+    country = np.full(len(values), "N/A", dtype=object)
+    plus = ~matched & np.char.startswith(text, "+")
+    cleaned[plus] = as_strings(digits[plus]).astype(object)
+    country[plus] = "Unknown"
+    for drop in np.unique(RULE_DROPS[rule_ids[matched]]):
+        rows = np.flatnonzero(matched & (RULE_DROPS[rule_ids] == drop))
+        cleaned[rows] = np.char.add(RULE_DIALS[rule_ids[rows]], as_strings(digits[rows], drop)).astype(object)
+    country[matched] = RULE_COUNTRIES[rule_ids[matched]]
+    empty = counts == 0
+    cleaned[empty] = ""
+    country[empty] = ""
+    return (original, cleaned, country) + e164_matrix(digits, rule_ids)
+
+def normalize_phone_series(phones):
+    # original/cleaned/country as process_phone_number gives them, plus the
+    # e164_parts columns: dial_code and national_number as nullable Int64,
+    # country_code as text or None.
+    phones = phones.fillna("").astype(str)
+    values = phones.to_numpy(dtype=object)
+    size = len(values)
+    original = np.empty(size, dtype=object)
+    cleaned = np.empty(size, dtype=object)
+    country = np.empty(size, dtype=object)
+    dial_codes = np.zeros(size, dtype=np.int64)
+    national = np.zeros(size, dtype=np.int64)
+    iso = np.full(size, None, dtype=object)
+    known = np.zeros(size, dtype=bool)
+    simple = ((np.fromiter(map(len, values), dtype=np.int64, count=size) <= MAX_PHONE_TEXT)
+              & np.fromiter(map(str.isascii, values), dtype=bool, count=size))
+    if simple.any():
+        (original[simple], cleaned[simple], country[simple], dial_codes[simple], national[simple],
+         iso[simple], known[simple]) = normalize_matrix(values[simple])
+    for position in np.flatnonzero(~simple):
+        processed = process_phone_number(values[position])
+        original[position] = processed["original"]
+        cleaned[position] = processed["cleaned"]
+        country[position] = processed["country"]
+        parts = e164_parts(cleaned[position], country[position])
+        if parts[0] is not None:
+            dial_codes[position], national[position], iso[position] = parts
+            known[position] = True
+    return pd.DataFrame({
+        "original": pd.Series(original, index=phones.index, dtype=object),
+        "cleaned": pd.Series(cleaned, index=phones.index, dtype=object),
+        "country": pd.Series(country, index=phones.index, dtype=object),
+        "dial_code": pd.Series(pd.arrays.IntegerArray(dial_codes, ~known), index=phones.index),
+        "national_number": pd.Series(pd.arrays.IntegerArray(national, ~known), index=phones.index),
+        "country_code": pd.Series(iso, index=phones.index, dtype=object),
+    })
+
+##############################################################################
+# E.164 parts stored as integers: dial code, national number, ISO country code
+##############################################################################
+def e164_parts(cleaned, country):
+    # (dial_code, national_number, country_code), or Nones for unmatched numbers.
+    codes = COUNTRY_CODES.get(country)
+    if not codes or not cleaned.startswith(f"+{codes[1]}"):
+        return None, None, None
+    iso, dial = codes
+    national = cleaned[len(str(dial)) + 1:]
+    if not national.isdigit():
+        return None, None, None
+    return dial, int(national), iso
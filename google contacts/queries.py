@@ -0,0 +1,148 @@
+from database import FTS_COLUMNS, escape_like, similar_names_query, split_tokens
+from phone_numbers import DIAL_CODES, MAX_E164_DIGITS, NON_DIGIT
+
+CONTACT_FIELDS = ["id", "full_name", "phone", "email", "data_source", "tags", "country", "country_code"]
+
+# Filter conditions; each code is also its label key in translations.
+CONDITIONS = ["equals", "not_empty", "contains", "has_tag", "has_any_tags", "similar", "phone_prefix"]
+
+# Conditions whose value is typed as free text rather than picked from a list.
+TEXT_CONDITIONS = ["contains", "has_any_tags", "similar", "phone_prefix"]
+
+##############################################################################
+# Filter queries, independent of the Tk widgets that collect them.
+# filters = [{"column": ..., "condition": one of CONDITIONS,
+#             "value": ..., "operator": "AND" | "OR"}, ...]
+# has_tag / has_any_tags ignore the column and match through contact_tags;
+# similar ignores it too and matches full_name through the trigram index; its
+# ranked candidates are a named subquery, so results can list the best match first;
+# phone_prefix matches "+<dial code><national digits>" on the integer E.164 columns.
+##############################################################################
+# Sort keys of a filter query, for paging: plain filters page by id, queries
+# built with ranked=True and a similar filter by rank (best match lowest), then id.
+ID_ORDER = ["id"]
+RANK_ORDER = ["rank", "id"]
+
+def not_empty_condition(col):
+    return f"({col} IS NOT NULL AND {col} != '' AND lower({col}) != 'n/a' AND lower({col}) != 'nan')"
+
+def contains_condition(col, val):
+    # full_name/email go through the FTS index; trigram matching needs 3+ characters.
+    if col in FTS_COLUMNS and len(val) >= 3:
+        phrase = '"' + val.replace('"', '""') + '"'
+        return "id IN (SELECT rowid FROM contacts_fts WHERE contacts_fts MATCH ?)", f"{col} : {phrase}"
+    return f"{col} LIKE ? ESCAPE '\\'", f"%{escape_like(val)}%"
+
+def tag_condition(names):
+    placeholders = ", ".join("?" for _ in names)
+    return f"""id IN (SELECT ct.contact_id FROM contact_tags ct JOIN tags t ON t.id = ct.tag_id
+                WHERE t.name IN ({placeholders}))"""
+
+def phone_prefix_ranges(val):
+    # (dial codes, [(low, high) national number ranges]) for a typed "+<digits>" prefix;
+    # no ranges means any national number. None when nothing was typed.
+    digits = NON_DIGIT.sub("", val)
+    if not digits:
+        return None
+    # Dial codes are prefix-free, so at most one of them starts the typed digits.
+    dial = next((code for code in DIAL_CODES if digits.startswith(str(code))), None)
+    if dial is None:
+        return [code for code in DIAL_CODES if str(code).startswith(digits)], []
+    national = digits[len(str(dial)):]
+    if not national:
+        return [dial], []
+    if national.startswith("0"):
+        return [], []
+    # One range per possible national number length.
+    start = int(national)
+    ranges = []
+    for length in range(len(national), MAX_E164_DIGITS - len(str(dial)) + 1):
+        scale = 10 ** (length - len(national))
+        ranges.append((start * scale, (start + 1) * scale - 1))
+    return [dial], ranges
+
+def phone_prefix_condition(val):
+    prefix = phone_prefix_ranges(val)
+    if prefix is None:
+        return None
+    codes, ranges = prefix
+    if not codes:
+        return "0", []
+    if not ranges:
+        return f"dial_code IN ({', '.join('?' for _ in codes)})", codes
+    # Each range is a scan of idx_contacts_e164.
+    params = list(codes)
+    for low, high in ranges:
+        params.extend([low, high])
+    return f"(dial_code = ? AND ({' OR '.join('national_number BETWEEN ? AND ?' for _ in ranges)}))", params
+
+def filter_condition(spec):
+    # Returns (sql, params), or None when the filter has no value yet.
+    # similar filters are handled by build_filter_query instead.
+    col = spec["column"]
+    cond = spec["condition"]
+    val = spec.get("value", "")
+    if cond == "equals":
+        if val != "":
+            return f"{col} = ?", [val]
+    elif cond == "not_empty":
+        return not_empty_condition(col), []
+    elif cond == "contains":
+        val = val.strip()
+        if val != "":
+            sql, param = contains_condition(col, val)
+            return sql, [param]
+    elif cond == "has_tag":
+        if val != "":
+            return tag_condition([val]), [val]
+    elif cond == "has_any_tags":
+        names = split_tokens(val)
+        if names:
+            return tag_condition(names), names
+    elif cond == "phone_prefix":
+        return phone_prefix_condition(val)
+    return None
+
+def filter_order(filters):
+    if any(spec["condition"] == "similar" and similar_names_query(spec.get("value", "")) is not None
+           for spec in filters):
+        return RANK_ORDER
+    return ID_ORDER
+
+def build_filter_query(filters, columns=None, ranked=False):
+    # ranked=True adds a trailing rank column: minus the best similar-name score,
+    # so sorting by filter_order(filters) lists the closest names first.
+    ranked_queries = []
+    scores = []
+    ranked_params = []
+    query = ""
+    params = []
+    for spec in filters:
+        if spec["condition"] == "similar":
+            similar = similar_names_query(spec.get("value", ""))
+            if similar is None:
+                continue
+            name = f"similar{len(ranked_queries)}"
+            ranked_queries.append(f"{name} AS ({similar[0]})")
+            ranked_params.extend(similar[1])
+            scores.append(f"COALESCE((SELECT score FROM {name} WHERE {name}.contact_id = contacts.id), 0)")
+            sql, values = f"id IN (SELECT contact_id FROM {name})", []
+        else:
+            condition = filter_condition(spec)
+            if condition is None:
+                continue
+            sql, values = condition
+        if query:
+            query += f" {spec.get('operator') or 'AND'} {sql}"
+        else:
+            query = sql
+        params.extend(values)
+    select = list(columns or CONTACT_FIELDS)
+    if ranked and scores:
+        select.append(f"-{scores[0] if len(scores) == 1 else 'max(' + ', '.join(scores) + ')'} AS rank")
+    base_query = f"SELECT {', '.join(select)} FROM contacts"
+    if ranked_queries:
+        base_query = f"WITH {', '.join(ranked_queries)} " + base_query
+    if not query:
+        return base_query, ranked_params
+    return base_query + " WHERE " + query, ranked_params + params
@@ -0,0 +1,66 @@
+import queue
+import sqlite3
+import threading
+from database import open_connection
+
+##############################################################################
+# QueryWorker: runs filter queries on a background thread with its own read
+# connection. Each submit() starts a new generation and interrupts whatever
+# the previous one is still running; results from older generations are
+# dropped. The Tk side drains `results` with after(), never blocking.
+##############################################################################
+class QueryWorker:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.generation = 0
+        self.lock = threading.Lock()
+        self.conn = None
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, steps):
+        # steps: [(name, sql, params), ...] run in order; each result is posted
+        # as (generation, name, rows), or (generation, "error", exception).
+        generation = self.cancel()
+        self.jobs.put((generation, steps))
+        return generation
+
+    def cancel(self):
+        with self.lock:
+            self.generation += 1
+            if self.conn is not None:
+                self.conn.interrupt()
+            return self.generation
+
+    def is_current(self, generation):
+        with self.lock:
+            return generation == self.generation
+
+    def run(self):
+        conn = open_connection(self.db_path, readonly=True)
+        with self.lock:
+            self.conn = conn
+        while True:
+            generation, steps = self.jobs.get()
+            if steps is None:
+                break
+            for name, sql, params in steps:
+                if not self.is_current(generation):
+                    break
+                try:
+                    rows = conn.execute(sql, params).fetchall()
+                except sqlite3.Error as e:
+                    # An interrupted query belongs to a cancelled generation: stay quiet.
+                    if self.is_current(generation):
+                        self.results.put((generation, "error", e))
+                    break
+                self.results.put((generation, name, rows))
+        with self.lock:
+            self.conn = None
+        conn.close()
+
+    def close(self):
+        self.cancel()
+        self.jobs.put((None, None))
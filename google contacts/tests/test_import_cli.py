@@ -0,0 +1,52 @@
+import sqlite3
+import pandas as pd
+import import_cli
+
+MAPPING = {"full_name": ["name"], "phone": "phone", "email": "email",
+           "data_source": None, "fixed_data_source": "vendor", "tags": None, "fixed_tags": ""}
+
+def write_csv(path, rows, offset):
+    pd.DataFrame({
+        "name": [f"Contact {offset + i}" for i in range(rows)],
+        "phone": [f"+90532{offset + i:07d}" for i in range(rows)],
+        "email": [f"c{offset + i}@example.com" for i in range(rows)],
+    }).to_csv(path, index=False)
+
+def test_cli_writes_files_chunk_by_chunk(tmp_path, monkeypatch):
+    files = [str(tmp_path / "a.csv"), str(tmp_path / "b.csv")]
+    write_csv(files[0], 95, 0)
+    write_csv(files[1], 40, 1000)
+    written = []
+    write_contacts = import_cli.write_contacts
+    def recording_write(conn, frame, *args):
+        written.append(len(frame))
+        return write_contacts(conn, frame, *args)
+    monkeypatch.setattr(import_cli, "write_contacts", recording_write)
+    build_contact_frame = import_cli.build_contact_frame
+    def bounded_build(data, mapping):
+        # Workers forked after the patch must only ever map one chunk at a time.
+        assert len(data) <= 10
+        return build_contact_frame(data, mapping)
+    monkeypatch.setattr(import_cli, "build_contact_frame", bounded_build)
+    db_path = str(tmp_path / "contacts.db")
+    totals = import_cli.import_files(files, MAPPING, db_path, workers=2, chunk_size=10, log=lambda line: None)
+    assert totals["failed"] == 0
+    assert totals["files"] == 2
+    assert totals["rows"] == totals["inserted"] == 135
+    assert max(written) <= 10
+    assert sum(written) == 135
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM contacts").fetchone()[0] == 135
+    conn.close()
+
+def test_cli_reports_unreadable_files(tmp_path):
+    good = str(tmp_path / "good.csv")
+    write_csv(good, 5, 0)
+    missing = str(tmp_path / "missing.csv")
+    lines = []
+    totals = import_cli.import_files([missing, good], MAPPING, str(tmp_path / "contacts.db"),
+                                     workers=1, chunk_size=10, log=lines.append)
+    assert totals["failed"] == 1
+    assert totals["files"] == 1
+    assert totals["rows"] == 5
+    assert any(line.startswith(missing) for line in lines)
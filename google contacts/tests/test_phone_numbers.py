@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+from phone_numbers import (PHONE_RULES, compile_rules, e164_parts, normalize_phone_series,
+                           process_phone_number, rule_key)
+
+def rule_numbers():
+    # For every rule: matching numbers in a few spellings, plus near misses one digit off.
+    numbers = []
+    for length, prefix, _, _, _ in PHONE_RULES:
+        for fill in "0", "7":
+            digits = prefix + fill * (length - len(prefix))
+            numbers += [digits, "+" + digits, f"({digits[:3]}) {digits[3:6]}-{digits[6:]}",
+                        digits[:-1], digits + "1", "+" + digits + "1"]
+    return numbers + ["", "   ", "n/a", "+", "abc 12", "٠٥٣٢١٢٣٤٥٦٧", "5" * 45]
+
+def test_series_matches_scalar_on_every_rule():
+    numbers = rule_numbers()
+    frame = normalize_phone_series(pd.Series(numbers))
+    for number, row in zip(numbers, frame.itertuples(index=False)):
+        expected = process_phone_number(number)
+        parts = e164_parts(expected["cleaned"], expected["country"])
+        got = (row.original, row.cleaned, row.country,
+               None if pd.isna(row.dial_code) else int(row.dial_code),
+               None if pd.isna(row.national_number) else int(row.national_number),
+               row.country_code)
+        assert got == (expected["original"], expected["cleaned"], expected["country"]) + parts, number
+
+def test_rule_keys_never_collide_for_long_prefixes():
+    rules = PHONE_RULES + [(12, "99812", 0, "", "Uzbekistan2"), (12, "9981", 0, "", "Uzbekistan3")]
+    table, max_prefix = compile_rules(rules)
+    keys = {rule_key(length, len(prefix), int(prefix), max_prefix)
+            for length, by_prefix in table.items() for prefix in by_prefix}
+    assert len(keys) == sum(len(by_prefix) for by_prefix in table.values())
+    # A 4-digit number never takes the key of a shorter or longer prefix.
+    assert rule_key(12, 4, 9981, max_prefix) != rule_key(12, 5, 99812, max_prefix)
+    assert rule_key(12, 5, 9981, max_prefix) != rule_key(12, 4, 9981, max_prefix)
+
+def test_compile_rules_rejects_prefixes_the_key_cannot_hold():
+    with pytest.raises(ValueError):
+        compile_rules([(30, "9" * 20, 0, "", "Nowhere")])
+    with pytest.raises(ValueError):
+        compile_rules([(4, "12345", 0, "", "Nowhere")])
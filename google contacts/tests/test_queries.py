@@ -0,0 +1,60 @@
+import pandas as pd
+from contact_cache import ContactCache
+from database import init_db, open_connection, similar_names
+from importer import bulk_import
+from queries import CONTACT_FIELDS, ID_ORDER, RANK_ORDER, build_filter_query, filter_order
+from virtual_grid import keyset_sql
+
+MAPPING = {"full_name": ["name"], "phone": None, "email": None,
+           "data_source": None, "fixed_data_source": "test", "tags": "tags", "fixed_tags": ""}
+
+# The exact match is added last, so id order and rank order differ.
+NAMES = ["Mehmet Yilmazer", "Ayse Kaya", "Mehmet Yilmaz Demir", "Ahmet Yilmaz", "Mehmet Yılmaz", "Mehmet Yilmaz"]
+
+def make_db(tmp_path):
+    db_path = str(tmp_path / "contacts.db")
+    data = pd.DataFrame({"name": NAMES, "tags": ["vip", "vip", "", "", "", ""]})
+    bulk_import(data, MAPPING, db_path=db_path)
+    conn = open_connection(db_path)
+    init_db(conn)
+    return conn
+
+def grid_pages(conn, filters, page_size=2):
+    # Pages the way VirtualGrid does: each page starts at the sort key after the last one.
+    query, params = build_filter_query(filters, CONTACT_FIELDS, ranked=True)
+    order = filter_order(filters)
+    select = ", ".join(CONTACT_FIELDS + order)
+    rows = conn.execute(keyset_sql(query, select, order) + " LIMIT ?", params + [page_size]).fetchall()
+    names = []
+    while rows:
+        names += [row[1] for row in rows]
+        last = rows[-1][len(CONTACT_FIELDS):]
+        rows = conn.execute(keyset_sql(query, select, order, ">") + " LIMIT ?",
+                            params + list(last) + [page_size]).fetchall()
+    return names
+
+def test_similar_results_are_ranked_best_first(tmp_path):
+    conn = make_db(tmp_path)
+    filters = [{"column": "full_name", "condition": "similar", "value": "Mehmet Yilmaz"}]
+    assert filter_order(filters) == RANK_ORDER
+    expected = [name for _, name, _ in similar_names(conn, "Mehmet Yilmaz")]
+    assert expected[:2] == ["Mehmet Yılmaz", "Mehmet Yilmaz"]
+    assert grid_pages(conn, filters) == expected
+    cache = ContactCache()
+    cache.load(conn)
+    positions = cache.filter(filters, conn)
+    assert list(cache.frame["full_name"].iloc[positions]) == expected
+
+def test_similar_or_other_filter_lists_matches_first(tmp_path):
+    conn = make_db(tmp_path)
+    filters = [{"column": "tags", "condition": "has_tag", "value": "vip"},
+               {"column": "full_name", "condition": "similar", "value": "Mehmet Yilmaz", "operator": "OR"}]
+    matches = [name for _, name, _ in similar_names(conn, "Mehmet Yilmaz")]
+    names = grid_pages(conn, filters)
+    assert names == matches + ["Ayse Kaya"]
+
+def test_plain_filters_page_by_id(tmp_path):
+    conn = make_db(tmp_path)
+    filters = [{"column": "data_source", "condition": "equals", "value": "test"}]
+    assert filter_order(filters) == ID_ORDER
+    assert grid_pages(conn, filters) == NAMES
@@ -0,0 +1,60 @@
+import pandas as pd
+from database import open_connection
+from importer import bulk_import
+from queries import CONTACT_FIELDS, build_filter_query, filter_order
+from virtual_grid import VirtualGrid
+
+MAPPING = {"full_name": ["name"], "phone": None, "email": None,
+           "data_source": None, "fixed_data_source": "test", "tags": None, "fixed_tags": ""}
+
+class PagingGrid:
+    # VirtualGrid's paging without Tk: requests run straight away instead of on the
+    # QueryWorker, and the grid has no reader connection to block on.
+    page_sql = VirtualGrid.page_sql
+    key_sql = VirtualGrid.key_sql
+    max_offset = VirtualGrid.max_offset
+    scroll_rows = VirtualGrid.scroll_rows
+    move_to = VirtualGrid.move_to
+    scroll_to = VirtualGrid.scroll_to
+
+    def __init__(self, conn, query, params, order, total, page_size=5):
+        self.conn = conn
+        self.db = None
+        self.frame = None
+        self.columns = list(CONTACT_FIELDS)
+        self.query, self.params, self.order = query, params, list(order)
+        self.total = total
+        self.page_size = page_size
+        self.requests = 0
+        self.show(0, conn.execute(self.page_sql() + " LIMIT ?", params + [page_size]).fetchall())
+
+    def request_page(self, target, sql, params):
+        self.requests += 1
+        self.target = target
+        self.show(target, self.conn.execute(sql, params).fetchall())
+
+    def show(self, offset, rows):
+        self.offset = self.target = offset
+        self.first_key = rows[0][len(self.columns):]
+        self.names = [row[1] for row in rows]
+
+def test_scrolling_pages_match_the_ordered_result(tmp_path):
+    db_path = str(tmp_path / "contacts.db")
+    names = [f"Mehmet Yilmaz {i:02d}" if i % 3 else f"Ayse Kaya {i:02d}" for i in range(60)]
+    bulk_import(pd.DataFrame({"name": names}), MAPPING, db_path=db_path)
+    conn = open_connection(db_path)
+    for filters in ([], [{"column": "full_name", "condition": "similar", "value": "Mehmet Yilmaz 07"}]):
+        query, params = build_filter_query(filters, CONTACT_FIELDS, ranked=True)
+        order = filter_order(filters)
+        expected = [row[1] for row in conn.execute(
+            f"SELECT * FROM ({query}) ORDER BY {', '.join(order)}", params)]
+        grid = PagingGrid(conn, query, params, order, len(expected))
+        for move, offset in [(lambda: grid.scroll_rows(3), 3), (lambda: grid.scroll_rows(3), 6),
+                             (lambda: grid.scroll_rows(-4), 2), (lambda: grid.scroll_to(len(expected)), None),
+                             (lambda: grid.scroll_rows(-7), None), (lambda: grid.scroll_to(1), 1)]:
+            move()
+            offset = grid.offset if offset is None else offset
+            assert grid.offset == offset
+            assert grid.names == expected[offset:offset + grid.page_size]
+        assert grid.offset == 1
+        assert grid.requests == 6
@@ -5,9 +5,13 @@ translations = {
     "en": {
         "upload_data": "Upload Data to Database",
         "extract_data": "Extract Data from DB",
+        "duplicates": "Find & Merge Duplicates",
         "back_main": "Back to Main Menu",
         "upload_file": "Upload Excel/CSV",
         "save_db": "Save to Database",
+        "save_mapping": "Save Column Mapping",
+        "mapping_saved": "Column mapping saved to",
+        "mapping_save_fail": "Failed to save column mapping",
         "clear_data": "Clear Data",
         "full_name": "Full Name (combine up to 3 columns):",
         "phone": "Phone Number:",
@@ -24,6 +28,11 @@ translations = {
         "condition": "Condition",
         "equals": "Equals",
         "not_empty": "Not Empty",
+        "contains": "Contains",
+        "has_tag": "Has Tag",
+        "has_any_tags": "Has Any of Tags (comma-separated)",
+        "similar": "Name Similar To",
+        "phone_prefix": "Phone Starts With",
         "language": "Language",
         "english": "English",
         "turkish": "Türkçe",
@@ -32,21 +41,45 @@ translations = {
         "file_load_success": "File loaded successfully with columns",
         "file_load_fail": "Failed to load file",
         "data_saved_db": "Data saved to database successfully.",
+        "import_fail": "Import failed",
+        "import_stats": "{rows} rows imported ({rate:.0f} rows/sec).",
+        "upsert_stats": "Inserted: {inserted}, updated: {updated}, skipped: {skipped}.",
+        "merge_duplicates": "Merge duplicates (same phone or email)",
         "data_cleared": "Data cleared. Please upload a new file.",
         "cleared": "Cleared",
         "error_fetch_values": "Error fetching values",
         "query_fail": "Query failed",
         "contacts_load_fail": "Failed to load contacts",
+        "showing_rows": "Rows {start}-{end} of {total}",
+        "counting_rows": "Rows {start}-{end}, counting...",
         "no_columns_selected": "No columns selected for export.",
+        "export_fail": "Export failed",
         "data_exported_csv": "Data exported as CSV to",
-        "data_exported_excel": "Data exported as Excel to"
+        "data_exported_excel": "Data exported as Excel to",
+        "find_duplicates": "Find Duplicates",
+        "merge_cluster": "Merge Cluster",
+        "cluster": "Cluster",
+        "dedupe_running": "Looking for duplicates...",
+        "dedupe_stats": "{pairs} matching pairs in {clusters} clusters ({duplicates} contacts), {seconds:.1f}s.",
+        "dedupe_fail": "Duplicate search failed",
+        "select_cluster": "Select a cluster or the contact to keep.",
+        "merge_confirm": "Merge cluster #{cluster} into the selected contact? The other contacts will be deleted.",
+        "merge_fail": "Merge failed",
+        "in_memory_filters": "In-memory filtering",
+        "cache_loading": "Loading contacts into memory...",
+        "cache_usage": "In memory: {rows} contacts, {size:.1f} MB",
+        "cache_fail": "Failed to load contacts into memory"
     },
     "tr": {
         "upload_data": "Veritabanına Veri Yükle",
         "extract_data": "Veritabanından Veri Çek",
+        "duplicates": "Mükerrer Kayıtları Bul ve Birleştir",
         "back_main": "Ana Menüye Dön",
         "upload_file": "Excel/CSV Yükle",
         "save_db": "Veritabanına Kaydet",
+        "save_mapping": "Sütun Eşleştirmesini Kaydet",
+        "mapping_saved": "Sütun eşleştirmesi kaydedildi:",
+        "mapping_save_fail": "Sütun eşleştirmesi kaydedilemedi",
         "clear_data": "Verileri Temizle",
         "full_name": "Ad Soyad (en fazla 3 sütun birleştir):",
         "phone": "Telefon Numarası:",
@@ -63,6 +96,11 @@ translations = {
         "condition": "Koşul",
         "equals": "Eşit",
         "not_empty": "Boş Olmayan",
+        "contains": "İçerir",
+        "has_tag": "Etiketi Var",
+        "has_any_tags": "Etiketlerden Biri Var (virgülle ayırın)",
+        "similar": "Adı Benzer",
+        "phone_prefix": "Telefon Şununla Başlar",
         "language": "Dil",
         "english": "İngilizce",
         "turkish": "Türkçe",
@@ -71,13 +109,33 @@ translations = {
         "file_load_success": "Dosya, sütunlarıyla birlikte başarıyla yüklendi",
         "file_load_fail": "Dosya yüklenemedi",
         "data_saved_db": "Veriler veritabanına başarıyla kaydedildi.",
+        "import_fail": "İçe aktarma başarısız oldu",
+        "import_stats": "{rows} satır içe aktarıldı (saniyede {rate:.0f} satır).",
+        "upsert_stats": "Eklenen: {inserted}, güncellenen: {updated}, atlanan: {skipped}.",
+        "merge_duplicates": "Tekrarlananları birleştir (aynı telefon veya e-posta)",
         "data_cleared": "Veriler temizlendi. Lütfen yeni bir dosya yükleyin.",
         "cleared": "Temizlendi",
         "error_fetch_values": "Değerler alınırken hata oluştu",
         "query_fail": "Sorgu başarısız oldu",
         "contacts_load_fail": "Kişiler yüklenemedi",
+        "showing_rows": "{total} kayıttan {start}-{end} arası",
+        "counting_rows": "{start}-{end} arası, sayılıyor...",
         "no_columns_selected": "Dışa aktarım için hiçbir sütun seçilmedi.",
+        "export_fail": "Dışa aktarma başarısız oldu",
         "data_exported_csv": "Veriler CSV olarak dışa aktarıldı",
-        "data_exported_excel": "Veriler Excel olarak dışa aktarıldı"
+        "data_exported_excel": "Veriler Excel olarak dışa aktarıldı",
+        "find_duplicates": "Mükerrerleri Bul",
+        "merge_cluster": "Grubu Birleştir",
+        "cluster": "Grup",
+        "dedupe_running": "Mükerrer kayıtlar aranıyor...",
+        "dedupe_stats": "{clusters} grupta {pairs} eşleşen çift ({duplicates} kişi), {seconds:.1f} sn.",
+        "dedupe_fail": "Mükerrer arama başarısız",
+        "select_cluster": "Bir grup veya saklanacak kişiyi seçin.",
+        "merge_confirm": "#{cluster} grubu seçili kişide birleştirilsin mi? Diğer kişiler silinecek.",
+        "merge_fail": "Birleştirme başarısız",
+        "in_memory_filters": "Bellekte filtrele",
+        "cache_loading": "Kişiler belleğe yükleniyor...",
+        "cache_usage": "Bellekte: {rows} kişi, {size:.1f} MB",
+        "cache_fail": "Kişiler belleğe yüklenemedi"
     }
 }
@@ -0,0 +1,223 @@
+import tkinter as tk
+from tkinter import ttk
+import queue
+from query_worker import QueryWorker
+
+# Milliseconds between checks for background query results (about 60 per second).
+POLL_MS = 16
+
+##############################################################################
+# VirtualGrid: a Treeview that only holds the visible window of a query.
+# Rows are paged from SQLite by their sort key, id unless a ranked query gives
+# another (keyset pagination); the scrollbar maps onto the total from
+# COUNT(*), so memory stays flat for any table size.
+# load_query() runs the first page and the count on a QueryWorker so slow
+# filters never freeze the window; scrolling pages run there too, as keyset
+# lookups from the first shown row (or OFFSET for long jumps).
+# load_frame() shows an in-memory DataFrame instead (see contact_cache).
+##############################################################################
+def keyset_sql(query, select, order, where=None, descending=False, bound=None):
+    # Rows of query in order; where ("<", ">=", ...) compares the order columns, as a
+    # row value, with bound (a subquery) or else one parameter each.
+    keys = ", ".join(order)
+    sql = f"SELECT {select} FROM ({query})"
+    if where:
+        sql += f" WHERE ({keys}) {where} {bound or '(' + ', '.join('?' for _ in order) + ')'}"
+    return sql + " ORDER BY " + (", ".join(col + " DESC" for col in order) if descending else keys)
+
+class VirtualGrid(tk.Frame):
+    def __init__(self, master, columns, db, page_size=20, on_change=None):
+        tk.Frame.__init__(self, master)
+        self.columns = columns
+        self.db = db
+        self.page_size = page_size
+        self.on_change = on_change
+        self.query = None
+        self.params = []
+        self.order = ["id"]
+        self.frame = None
+        self.positions = None
+        self.total = 0
+        self.offset = 0
+        self.target = 0
+        self.first_key = None
+        self.worker = QueryWorker(db.db_path)
+        self.generation = None
+        self.on_error = None
+        self.polling = False
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", height=page_size)
+        for col in columns:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=120)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.on_scroll)
+        self.scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.tree.bind("<MouseWheel>", self.on_mousewheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll_rows(-3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll_rows(3))
+
+    def page_sql(self, where=None, bound=None):
+        # Shown columns followed by each row's sort key.
+        return keyset_sql(self.query, ", ".join(self.columns + self.order), self.order, where, bound=bound)
+
+    def key_sql(self, where=None, descending=False):
+        return keyset_sql(self.query, ", ".join(self.order), self.order, where, descending) + " LIMIT 1 OFFSET ?"
+
+    def load_query(self, query, params, on_error=None, order=("id",)):
+        # query must select the grid's columns and the order columns (queries.filter_order).
+        # The first page shows as soon as it is ready, the total follows. A newer
+        # load (or cancel) interrupts this one.
+        self.query = query
+        self.params = list(params)
+        self.order = list(order)
+        self.frame = None
+        self.total = None
+        self.on_error = on_error
+        self.show_rows(0, [])
+        self.generation = self.worker.submit([
+            ("page", self.page_sql() + " LIMIT ?", self.params + [self.page_size]),
+            ("count", f"SELECT COUNT(*) FROM ({query})", self.params),
+        ])
+        self.start_polling()
+
+    def request_page(self, target, sql, params):
+        # One page for offset target; a newer request interrupts this one.
+        self.target = target
+        self.generation = self.worker.submit([("scroll", sql, params)])
+        self.start_polling()
+
+    def start_polling(self):
+        if not self.polling:
+            self.polling = True
+            self.after(POLL_MS, self.poll_results)
+
+    def load_frame(self, frame, positions):
+        # Shows frame rows at positions; pages are read from memory, nothing goes back to SQLite.
+        self.cancel()
+        self.query = None
+        self.frame = frame
+        self.positions = positions
+        self.total = len(positions)
+        self.show_frame_rows(0)
+
+    def show_frame_rows(self, offset):
+        rows = self.positions[offset:offset + self.page_size]
+        page = self.frame.iloc[rows][self.columns].astype(object)
+        page = page.where(page.notna(), "")
+        self.show_rows(offset, list(page.itertuples(index=False, name=None)))
+
+    def cancel(self):
+        self.worker.cancel()
+        self.generation = None
+        self.target = self.offset
+
+    def close(self):
+        # Stops the worker thread and closes its read connection.
+        self.generation = None
+        self.worker.close()
+
+    def poll_results(self):
+        while self.generation is not None:
+            try:
+                result_generation, name, payload = self.worker.results.get_nowait()
+            except queue.Empty:
+                self.after(POLL_MS, self.poll_results)
+                return
+            if result_generation != self.generation:
+                continue
+            if name == "page":
+                self.show_rows(0, payload)
+            elif name == "scroll":
+                # No rows means the contacts changed under the page; stay where we are.
+                if payload:
+                    self.show_rows(self.target, payload)
+                else:
+                    self.target = self.offset
+                self.generation = None
+            elif name == "count":
+                self.total = payload[0][0]
+                self.update_scrollbar(len(self.tree.get_children()))
+                self.generation = None
+            elif name == "error":
+                self.generation = None
+                self.target = self.offset
+                if self.on_error:
+                    self.on_error(payload)
+        self.polling = False
+
+    def show_rows(self, offset, rows):
+        # Query rows end with their sort key; frame rows are only the shown columns.
+        self.offset = offset
+        self.target = offset
+        self.first_key = rows[0][len(self.columns):] if rows else None
+        self.tree.delete(*self.tree.get_children())
+        for row in rows:
+            self.tree.insert("", "end", values=row[:len(self.columns)])
+        self.update_scrollbar(len(rows))
+
+    def update_scrollbar(self, shown):
+        # total is None while the count is still running.
+        if self.total:
+            self.scrollbar.set(self.offset / self.total, (self.offset + shown) / self.total)
+        else:
+            self.scrollbar.set(0, 1)
+        if self.on_change:
+            self.on_change(self.offset + 1 if shown else 0, self.offset + shown, self.total)
+
+    def max_offset(self):
+        if self.total is None:
+            return 0
+        return max(self.total - self.page_size, 0)
+
+    def scroll_rows(self, count):
+        if self.frame is not None:
+            target = min(max(self.offset + count, 0), self.max_offset())
+            if target != self.offset:
+                self.show_frame_rows(target)
+            return
+        if self.query is None or self.first_key is None or count == 0:
+            return
+        # Steps add up from the page already requested, so fast wheel turns are not lost.
+        self.move_to(min(max(self.target + count, 0), self.max_offset()))
+
+    def move_to(self, target):
+        # Page at target, counted from the first shown row.
+        if target == self.target:
+            return
+        step = target - self.offset
+        key = list(self.first_key)
+        if step >= 0:
+            self.request_page(target, self.page_sql(">=") + " LIMIT ? OFFSET ?",
+                              self.params + key + [self.page_size, step])
+        else:
+            # Starts at the row -step places before the first shown one.
+            bound = f"({self.key_sql('<', descending=True)})"
+            self.request_page(target, self.page_sql(">=", bound) + " LIMIT ?",
+                              self.params + self.params + key + [-step - 1, self.page_size])
+
+    def scroll_to(self, offset):
+        # Near targets step from the shown rows; long jumps (scrollbar drags) skip by OFFSET.
+        if self.frame is not None:
+            self.scroll_rows(int(offset) - self.offset)
+            return
+        if self.query is None:
+            return
+        offset = min(max(int(offset), 0), self.max_offset())
+        if self.first_key is not None and abs(offset - self.offset) <= self.page_size * 10:
+            self.move_to(offset)
+        elif offset != self.target:
+            self.request_page(offset, self.page_sql() + " LIMIT ? OFFSET ?",
+                              self.params + [self.page_size, offset])
+
+    def on_scroll(self, action, amount, unit=None):
+        if action == "moveto":
+            if self.total is not None:
+                self.scroll_to(float(amount) * self.total)
+        elif action == "scroll":
+            count = int(amount)
+            if unit == "pages":
+                count *= self.page_size
+            self.scroll_rows(count)
+
+    def on_mousewheel(self, event):
+        self.scroll_rows(-3 if event.delta > 0 else 3)
@@ -1,10 +1,17 @@
 import os
 import sys
+import contextvars
+import queue
+import atexit
 import threading
 import time
 import re
+import sqlite3
+import hashlib
 import requests
 import json
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import date, timedelta, datetime
 from bs4 import BeautifulSoup
 import tkinter as tk
@@ -18,6 +25,7 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
 
 # Global language variable (default is English)
@@ -74,10 +82,41 @@ class TextRedirector(object):
     def flush(self):
         pass
 
+# ---------------------------
+# Per-run log output
+# ---------------------------
+# An update run can send its log lines to its own output (a callable taking
+# text) instead of stdout, so overlapping runs never share a capture.
+log_output = contextvars.ContextVar("log_output", default=None)
+
+def log(*parts):
+    output = log_output.get()
+    if output is None:
+        print(*parts)
+    else:
+        output(" ".join(str(part) for part in parts) + "\n")
+
+def run_with_output(output, function, *args, **kwargs):
+    # Runs function with its log lines, and those of the jobs it submits
+    # through submit_in_context, going to output (stdout when None).
+    context = contextvars.copy_context()
+    if output is not None:
+        context.run(log_output.set, output)
+    return context.run(function, *args, **kwargs)
+
+def submit_in_context(executor, function, *args):
+    # Executor threads don't inherit context variables on their own.
+    return executor.submit(contextvars.copy_context().run, function, *args)
+
 # ---------------------------
 # Selenium driver initialization using webdriver_manager
 # ---------------------------
+chrome_driver_path = None
+DRIVER_PAGE_LOAD_TIMEOUT = 60  # seconds; a hung page load must fail well inside every site deadline
+
 def get_chrome_driver(headless=True):
+    # The chromedriver binary is resolved once per process, not once per browser.
+    global chrome_driver_path
     options = Options()
     if headless:
         options.headless = True
@@ -86,72 +125,184 @@ def get_chrome_driver(headless=True):
         options.add_argument("--disable-gpu")
         options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
                              "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36")
-    service = Service(ChromeDriverManager().install())
+    if chrome_driver_path is None:
+        chrome_driver_path = ChromeDriverManager().install()
+    service = Service(chrome_driver_path)
     driver = webdriver.Chrome(service=service, options=options)
+    driver.set_page_load_timeout(min([DRIVER_PAGE_LOAD_TIMEOUT] + list(SITE_TIMEOUTS.values())))
     return driver
 
+# ---------------------------
+# Pool of warm Chrome drivers shared by all sites, attempts and auto-update cycles
+# ---------------------------
+DRIVER_POOL_SIZE = 4     # browsers open at most at once
+DRIVER_MAX_USES = 25     # a browser is recycled after this many page loads
+
+class DriverPool(object):
+    def __init__(self, size=DRIVER_POOL_SIZE, max_uses=DRIVER_MAX_USES, headless=True):
+        self.max_uses = max_uses
+        self.headless = headless
+        self.idle = queue.LifoQueue()  # most recently used (warmest) browser first
+        self.uses = {}
+        self.slots = threading.BoundedSemaphore(size)
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        # Blocks while all browsers are busy; dead idle browsers are replaced.
+        self.slots.acquire()
+        try:
+            while True:
+                try:
+                    driver = self.idle.get_nowait()
+                except queue.Empty:
+                    driver = get_chrome_driver(headless=self.headless)
+                    with self.lock:
+                        self.uses[id(driver)] = 0
+                    return driver
+                if self.is_healthy(driver):
+                    return driver
+                self.discard(driver)
+        except Exception:
+            self.slots.release()
+            raise
+
+    def release(self, driver):
+        with self.lock:
+            self.uses[id(driver)] = self.uses.get(id(driver), 0) + 1
+            worn_out = self.uses[id(driver)] >= self.max_uses
+        if worn_out or not self.reset(driver):
+            self.discard(driver)
+        else:
+            self.idle.put(driver)
+        self.slots.release()
+
+    def is_healthy(self, driver):
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def reset(self, driver):
+        # Leave no cookies or page state behind for the next site.
+        try:
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            driver.get("about:blank")
+            return True
+        except Exception:
+            return False
+
+    def discard(self, driver):
+        with self.lock:
+            self.uses.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def close(self):
+        while True:
+            try:
+                driver = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            self.discard(driver)
+
+driver_pool = DriverPool()
+atexit.register(driver_pool.close)
+
+# ---------------------------
+# Waiting for the price element instead of sleeping a fixed time
+# ---------------------------
+# site: (CSS selector of the price, seconds to wait for it)
+PRICE_WAITS = {
+    "etstur": ("p.amount", 20),
+    "trivago": ("[data-testid=recommended-price]", 30),
+    "tatilbudur": ("div.c-card__current-price", 30),
+    "otelz": ("div.price", 30)
+}
+
+# site: {"count", "total", "max", "timeouts"} of the waits above, to tune the deadlines
+wait_stats = {}
+wait_stats_lock = threading.Lock()
+
+def record_wait(site, seconds, timed_out):
+    with wait_stats_lock:
+        stats = wait_stats.setdefault(site, {"count": 0, "total": 0.0, "max": 0.0, "timeouts": 0})
+        stats["count"] += 1
+        stats["total"] += seconds
+        stats["max"] = max(stats["max"], seconds)
+        stats["timeouts"] += 1 if timed_out else 0
+
+def print_wait_stats():
+    with wait_stats_lock:
+        for site, stats in sorted(wait_stats.items()):
+            log(f"{site} price wait: avg {stats['total'] / stats['count']:.1f}s, max {stats['max']:.1f}s, "
+                  f"{stats['timeouts']} timeouts in {stats['count']} loads\n")
+
+def wait_for_price(driver, site):
+    # Returns the text of the first price element that has any digits, or "" at the deadline.
+    selector, timeout = PRICE_WAITS[site]
+    def price_text(driver):
+        for element in driver.find_elements(By.CSS_SELECTOR, selector):
+            text = (element.get_attribute("textContent") or "").strip()
+            if re.search(r"\d", text):
+                return text
+        return False
+    started = time.monotonic()
+    try:
+        text = WebDriverWait(driver, timeout, poll_frequency=0.25).until(price_text)
+    except TimeoutException:
+        record_wait(site, time.monotonic() - started, True)
+        return ""
+    record_wait(site, time.monotonic() - started, False)
+    return text
+
 # ---------------------------
 # Price extraction functions for Etstur, Trivago, Tatilbudur
 # ---------------------------
 def get_price_etstur(driver, url):
     driver.get(url)
-    time.sleep(5)
-    html = driver.page_source
-    soup = BeautifulSoup(html, "html.parser")
-    price_element = soup.find("p", class_="amount")
-    return price_element.get_text(strip=True) if price_element else ""
+    return wait_for_price(driver, "etstur")
 
 def get_price_trivago(driver, url):
     driver.get(url)
-    time.sleep(10)
-    html = driver.page_source
-    soup = BeautifulSoup(html, "html.parser")
-    price_element = soup.find(attrs={"data-testid": "recommended-price"})
-    return price_element.get_text(strip=True) if price_element else ""
+    return wait_for_price(driver, "trivago")
 
 def get_price_tatil(driver, url):
     driver.get(url)
-    time.sleep(10)
-    html = driver.page_source
-    soup = BeautifulSoup(html, "html.parser")
-    price_element = soup.find("div", class_="c-card__current-price")
-    return price_element.get_text(strip=True) if price_element else ""
+    return wait_for_price(driver, "tatilbudur")
 
 def clean_price(price_str):
     digits = re.sub(r'\D', '', price_str)
     return int(digits) if digits else None
 
-def extract_price_with_retry(extraction_function, url, max_attempts=5):
+def extract_price_with_retry(extraction_function, url, max_attempts=5, deadline=None):
     for attempt in range(1, max_attempts + 1):
-        driver = get_chrome_driver(headless=True)
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+        driver = driver_pool.acquire()
         try:
             raw_price = extraction_function(driver, url)
             price = clean_price(raw_price)
             if price is not None:
-                print(f"Success on attempt {attempt} for {url}\n")
+                log(f"Success on attempt {attempt} for {url}\n")
                 return price
             else:
                 pass
-                print(f"Attempt {attempt} for {url} did not find a valid price.\n")
+                log(f"Attempt {attempt} for {url} did not find a valid price.\n")
         except Exception as e:
             pass
-            print(f"Attempt {attempt} for {url} raised an error: {e}\n")
+            log(f"Attempt {attempt} for {url} raised an error: {e}\n")
         finally:
-            driver.quit()
-            time.sleep(2)
+            driver_pool.release(driver)
+        time.sleep(2)
     return None
 
 # ---------------------------
 # Updated Otelz extraction with custom parameters (city and number of people)
 # ---------------------------
-def get_price_otelz_custom(otelz_link, city, desired_people):
-    options = Options()
-    options.add_argument("--headless")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--disable-gpu")
-    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                         "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36")
-    driver = webdriver.Chrome(options=options)
+def get_price_otelz_custom(driver, otelz_link, city, desired_people):
     wait = WebDriverWait(driver, 15)
     
     driver.get(otelz_link)
@@ -171,7 +322,6 @@ def get_price_otelz_custom(otelz_link, city, desired_people):
     search_input = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "input.search-input")))
     search_input.clear()
     search_input.send_keys(city)
-    time.sleep(5)  # wait for suggestions to load
     
     try:
         suggestion_item = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "div.name")))
@@ -179,14 +329,12 @@ def get_price_otelz_custom(otelz_link, city, desired_people):
     except Exception as e:
         pass
         # print(f"Otelz: Could not click suggestion item for city '{city}'.")
-    time.sleep(5)
     
     # Click the rooms container
     rooms_container = wait.until(EC.element_to_be_clickable(
         (By.CSS_SELECTOR, "div.sc-16f24a25-0.itAImy.rooms")
     ))
     rooms_container.click()
-    time.sleep(2)
     
     # Adjust the number of adults (default is 2)
     default_adults = 2
@@ -197,50 +345,319 @@ def get_price_otelz_custom(otelz_link, city, desired_people):
         ))
         for _ in range(diff):
             plus_btn.click()
-            time.sleep(1)
+            time.sleep(0.2)  # let the counter update between clicks
     elif diff < 0:
         minus_btn = wait.until(EC.element_to_be_clickable(
             (By.CSS_SELECTOR, "div.line.ADULT div.controls div.minus")
         ))
         for _ in range(abs(diff)):
             minus_btn.click()
-            time.sleep(1)
+            time.sleep(0.2)  # let the counter update between clicks
     
     # Click the search button
     search_btn = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "button.search-btn")))
     search_btn.click()
-    time.sleep(5)
     
     # After redirection, click the button with data-testid "lowestPrice"
     lowest_price_btn = wait.until(EC.element_to_be_clickable(
         (By.CSS_SELECTOR, 'button[data-testid="lowestPrice"]')
     ))
+    # Prices listed before the re-sort must not be read; wait for them to be replaced.
+    old_prices = driver.find_elements(By.CSS_SELECTOR, PRICE_WAITS["otelz"][0])
     lowest_price_btn.click()
-    time.sleep(5)
+    if old_prices:
+        try:
+            WebDriverWait(driver, 10, poll_frequency=0.25).until(EC.staleness_of(old_prices[0]))
+        except TimeoutException:
+            pass
     
+    price_text = wait_for_price(driver, "otelz")
     final_url = driver.current_url
-    price_element = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.price")))
-    price_text = price_element.text.strip()
     
-    driver.quit()
     return clean_price(price_text), final_url
 
-def extract_price_otelz_custom_with_retry(otelz_link, city, desired_people, max_attempts=5):
+def extract_price_otelz_custom_with_retry(otelz_link, city, desired_people, max_attempts=5, deadline=None):
     for attempt in range(1, max_attempts + 1):
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+        driver = driver_pool.acquire()
         try:
-            price, final_url = get_price_otelz_custom(otelz_link, city, desired_people)
+            price, final_url = get_price_otelz_custom(driver, otelz_link, city, desired_people)
             if price is not None:
-                print(f"Otelz extraction succeeded on attempt {attempt}\n")
+                log(f"Otelz extraction succeeded on attempt {attempt}\n")
                 return price, final_url
             else:
                 pass
-                print(f"Otelz extraction attempt {attempt} did not find a valid price.\n")
+                log(f"Otelz extraction attempt {attempt} did not find a valid price.\n")
         except Exception as e:
             pass
-            print(f"Otelz extraction attempt {attempt} raised an error: {e}\n")
+            log(f"Otelz extraction attempt {attempt} raised an error: {e}\n")
+        finally:
+            driver_pool.release(driver)
         time.sleep(2)
     return None, None
 
+# ---------------------------
+# Extractor registry: a plain HTTP fast path per site, the browser as fallback
+# ---------------------------
+HTTP_TIMEOUT = 15            # seconds for one fast-path request
+PRICE_RANGE = (100, 500000)  # TL; anything outside is a parse error, not a price
+
+HTTP_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36",
+    "Accept-Language": "tr-TR,tr;q=0.9,en;q=0.8"
+}
+
+# requests.Session is not documented as thread-safe, so each extraction thread keeps its own.
+http_sessions = threading.local()
+
+def http_session():
+    session = getattr(http_sessions, "session", None)
+    if session is None:
+        session = http_sessions.session = requests.Session()
+        session.headers.update(HTTP_HEADERS)
+    return session
+
+def valid_price(price):
+    return price is not None and PRICE_RANGE[0] <= price <= PRICE_RANGE[1]
+
+def http_price(url, spec):
+    # Price from the server HTML, read from the element the site's spec declares.
+    response = http_session().get(url, timeout=HTTP_TIMEOUT)
+    response.raise_for_status()
+    soup = BeautifulSoup(response.text, "html.parser")
+    element = soup.select_one(spec["selector"])
+    if element is None:
+        return None
+    price = clean_price(element.get_text(strip=True))
+    return price if spec["valid"](price) else None
+
+# site: {"http": {"selector": CSS of the price element in the server HTML, "valid": check
+#                 on the parsed price}, or None when the page needs a browser;
+#        "browser": retry function taking the job args and deadline=}
+EXTRACTORS = {
+    "etstur": {"http": {"selector": PRICE_WAITS["etstur"][0], "valid": valid_price},
+               "browser": partial(extract_price_with_retry, get_price_etstur)},
+    "trivago": {"http": {"selector": PRICE_WAITS["trivago"][0], "valid": valid_price},
+                "browser": partial(extract_price_with_retry, get_price_trivago)},
+    "tatilbudur": {"http": {"selector": PRICE_WAITS["tatilbudur"][0], "valid": valid_price},
+                   "browser": partial(extract_price_with_retry, get_price_tatil)},
+    # The price only exists after a city search and adult count are entered in the page.
+    "otelz": {"http": None, "browser": extract_price_otelz_custom_with_retry}
+}
+
+# (site, path): {"tries", "successes", "total"} so sites that never need the browser show up
+path_stats = {}
+
+def record_path(site, path, seconds, success):
+    with wait_stats_lock:
+        stats = path_stats.setdefault((site, path), {"tries": 0, "successes": 0, "total": 0.0})
+        stats["tries"] += 1
+        stats["successes"] += 1 if success else 0
+        stats["total"] += seconds
+
+def print_path_stats():
+    with wait_stats_lock:
+        for (site, path), stats in sorted(path_stats.items()):
+            log(f"{site} {path} path: {stats['successes']}/{stats['tries']} succeeded, "
+                  f"avg {stats['total'] / stats['tries']:.1f}s\n")
+
+def extract_site_price(site, *args, deadline=None):
+    # args: the page url first, then whatever else the site's browser function needs.
+    extractor = EXTRACTORS[site]
+    if extractor["http"] is not None:
+        started = time.monotonic()
+        try:
+            price = http_price(args[0], extractor["http"])
+        except Exception as e:
+            log(f"{site}: HTTP fetch failed ({e}), using the browser.\n")
+            price = None
+        record_path(site, "http", time.monotonic() - started, price is not None)
+        if price is not None:
+            log(f"{site}: price found without the browser.\n")
+            return price
+    started = time.monotonic()
+    result = extractor["browser"](*args, deadline=deadline)
+    record_path(site, "browser", time.monotonic() - started, has_price(result))
+    return result
+
+# ---------------------------
+# Price cache: prices rarely change within the hour, so recent ones are reused
+# ---------------------------
+PRICE_CACHE_DB = "price_cache.db"
+PRICE_TTLS = {"etstur": 3600, "trivago": 3600, "tatilbudur": 3600, "otelz": 3600}  # seconds a price stays fresh
+PRICE_STALE_MAX = 24 * 3600        # older prices are never published, even while revalidating
+STALE_WHILE_REVALIDATE = True      # publish a stale price now and refresh it in the background
+
+def normalize_url(url):
+    # Same page, same key: lowercase host, no fragment or tracking parameters, sorted query.
+    from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
+    parts = urlparse(url.strip())
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if not k.lower().startswith("utm_"))
+    return urlunparse((parts.scheme.lower(), parts.netloc.lower(), parts.path, parts.params, urlencode(query), ""))
+
+def has_price(result):
+    # Extraction results are a price, or (price, final url) for Otelz.
+    if isinstance(result, tuple):
+        return result[0] is not None
+    return result is not None
+
+class PriceCache(object):
+    def __init__(self, db_name=PRICE_CACHE_DB):
+        self.db_name = db_name
+        self.stats = {}
+        self.lock = threading.Lock()
+        conn = self.connect()
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS prices (
+            site TEXT NOT NULL, url TEXT NOT NULL,
+            check_in TEXT NOT NULL, check_out TEXT NOT NULL, guests INTEGER NOT NULL,
+            result TEXT NOT NULL, fetched_at REAL NOT NULL,
+            PRIMARY KEY (site, url, check_in, check_out, guests)
+        )
+        """)
+        # The same file remembers published containers and uploaded logos.
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS published_pages (
+            page TEXT PRIMARY KEY, digest TEXT NOT NULL, written_at REAL NOT NULL
+        )
+        """)
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS media (
+            site TEXT NOT NULL, digest TEXT NOT NULL,
+            media_id INTEGER, source_url TEXT NOT NULL,
+            PRIMARY KEY (site, digest)
+        )
+        """)
+        conn.execute("DELETE FROM prices WHERE fetched_at < ?", (time.time() - PRICE_STALE_MAX,))
+        conn.commit()
+        conn.close()
+
+    def connect(self):
+        # One short-lived connection per call; extraction threads share the file.
+        conn = sqlite3.connect(self.db_name, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def get(self, site, key):
+        # (result, fresh) for key = (url, check_in, check_out, guests), or None.
+        url, check_in, check_out, guests = key
+        conn = self.connect()
+        row = conn.execute(
+            "SELECT result, fetched_at FROM prices WHERE site=? AND url=? AND check_in=? AND check_out=? AND guests=?",
+            (site, normalize_url(url), check_in, check_out, guests)).fetchone()
+        conn.close()
+        if row is None:
+            return None
+        age = time.time() - row[1]
+        if age > PRICE_STALE_MAX:
+            return None
+        result = json.loads(row[0])
+        return (tuple(result) if isinstance(result, list) else result), age <= PRICE_TTLS[site]
+
+    def put(self, site, key, result):
+        url, check_in, check_out, guests = key
+        conn = self.connect()
+        conn.execute("INSERT OR REPLACE INTO prices VALUES (?, ?, ?, ?, ?, ?, ?)",
+                     (site, normalize_url(url), check_in, check_out, guests, json.dumps(result), time.time()))
+        conn.commit()
+        conn.close()
+
+    def count(self, site, outcome):
+        with self.lock:
+            stats = self.stats.setdefault(site, {"hit": 0, "stale": 0, "miss": 0})
+            stats[outcome] += 1
+
+    def print_stats(self):
+        with self.lock:
+            for site, stats in sorted(self.stats.items()):
+                total = stats["hit"] + stats["stale"] + stats["miss"]
+                log(f"{site} price cache: {(stats['hit'] + stats['stale']) * 100 // total}% hit rate "
+                      f"({stats['hit']} fresh, {stats['stale']} stale, {stats['miss']} misses)\n")
+
+price_cache = PriceCache()
+
+# ---------------------------
+# Run the four site extractions side by side with a deadline per site
+# ---------------------------
+SITE_TIMEOUTS = {"etstur": 120, "trivago": 150, "tatilbudur": 150, "otelz": 240}  # seconds
+
+# Pages of different accounts extracting at the same time never send one OTA more than this many at once.
+SITE_CONCURRENCY = {"etstur": 2, "trivago": 2, "tatilbudur": 2, "otelz": 1}
+
+# One pool per site sized by its limit, so a job queued for a busy site never holds a
+# thread another site could use; browsers are still limited by the driver pool.
+site_executors = {site: ThreadPoolExecutor(max_workers=limit, thread_name_prefix=f"extract-{site}")
+                  for site, limit in SITE_CONCURRENCY.items()}
+
+# (site, cache key) pairs being refreshed in the background right now
+revalidating = set()
+revalidating_lock = threading.Lock()
+
+def extract_and_cache(site, key, function, args, begun=None):
+    # The site deadline starts when a thread picks the job up, not while it waits in the
+    # queue; it is handed to the waiter through begun.
+    deadline = time.monotonic() + SITE_TIMEOUTS[site]
+    if begun is not None:
+        begun.put(deadline)
+    result = function(*args, deadline=deadline)
+    if has_price(result):
+        price_cache.put(site, key, result)
+    return result
+
+def revalidate(site, key, function, args):
+    try:
+        result = extract_and_cache(site, key, function, args)
+        if has_price(result):
+            log(f"{site}: cached price refreshed in the background.\n")
+    except Exception as e:
+        log(f"{site}: background refresh failed: {e}\n")
+    finally:
+        with revalidating_lock:
+            revalidating.discard((site, key))
+
+def extract_all_prices(jobs):
+    # jobs: {site: (retry_function, args, result used when the site gives nothing,
+    #               cache key (url, check_in, check_out, guests))}.
+    # A site that misses its deadline, counted from when its job starts running, gets
+    # its fallback; its thread stops retrying at the deadline and hands its browser back.
+    started = time.monotonic()
+    futures = {}
+    results = {}
+    for site, (function, args, fallback, key) in jobs.items():
+        cached = price_cache.get(site, key)
+        if cached is not None and cached[1]:
+            price_cache.count(site, "hit")
+            results[site] = cached[0]
+            continue
+        if cached is not None and STALE_WHILE_REVALIDATE:
+            price_cache.count(site, "stale")
+            results[site] = cached[0]
+            with revalidating_lock:
+                if (site, key) in revalidating:
+                    continue
+                revalidating.add((site, key))
+            submit_in_context(site_executors[site], revalidate, site, key, function, args)
+            continue
+        price_cache.count(site, "miss")
+        begun = queue.Queue(1)
+        futures[site] = (submit_in_context(site_executors[site], extract_and_cache, site, key, function, args, begun), begun)
+    for site, (future, begun) in futures.items():
+        fallback = jobs[site][2]
+        try:
+            deadline = begun.get()
+            results[site] = future.result(timeout=max(deadline - time.monotonic(), 0))
+        except FutureTimeoutError:
+            log(f"{site}: no price within {SITE_TIMEOUTS[site]}s, continuing without it.\n")
+            results[site] = fallback
+        except Exception as e:
+            log(f"{site}: extraction failed: {e}\n")
+            results[site] = fallback
+    log(f"Price extraction took {time.monotonic() - started:.1f}s\n")
+    return results
+
 # ---------------------------
 # Functions to update provided extraction links with dynamic dates
 # ---------------------------
@@ -318,7 +735,22 @@ def build_container_html(logo_urls, site_data, best_price, last_update, lang="en
 # ---------------------------
 # WordPress media and page functions
 # ---------------------------
+def cached_media(base_url, digest):
+    # (media id, source_url) of a file with this content already on the site, or None.
+    conn = price_cache.connect()
+    row = conn.execute("SELECT media_id, source_url FROM media WHERE site=? AND digest=?",
+                       (base_url, digest)).fetchone()
+    conn.close()
+    return row
+
+def save_cached_media(base_url, digest, media_id, source_url):
+    conn = price_cache.connect()
+    conn.execute("INSERT OR REPLACE INTO media VALUES (?, ?, ?, ?)", (base_url, digest, media_id, source_url))
+    conn.commit()
+    conn.close()
+
 def get_existing_media(file_name, username, password, base_url):
+    # The matching media item (with "id" and "source_url"), or None.
     media_endpoint = base_url + "wp-json/wp/v2/media"
     params = {"search": file_name}
     response = requests.get(media_endpoint, params=params, auth=(username, password))
@@ -330,31 +762,43 @@ def get_existing_media(file_name, username, password, base_url):
         source_url = item.get("source_url", "")
         if file_name.lower() in source_url.lower():
             # print(f"Found existing {file_name}. URL: {source_url}\n")
-            return source_url
+            return item
     return None
 
 def upload_media(file_path, username, password, base_url):
+    # Logos already uploaded to this site (same bytes, any name) come from the
+    # local media table without a single REST call.
     file_name = os.path.basename(file_path)
-    existing_url = get_existing_media(file_name, username, password, base_url)
-    if existing_url:
-        return existing_url
+    digest = None
+    if os.path.exists(file_path):
+        with open(file_path, "rb") as f:
+            file_data = f.read()
+        digest = hashlib.sha256(file_data).hexdigest()
+        cached = cached_media(base_url, digest)
+        if cached:
+            return cached[1]
+    existing = get_existing_media(file_name, username, password, base_url)
+    if existing:
+        if digest:
+            save_cached_media(base_url, digest, existing.get("id"), existing["source_url"])
+        return existing["source_url"]
     media_endpoint = base_url + "wp-json/wp/v2/media"
-    if not os.path.exists(file_path):
-        print(f"File {file_path} does not exist.\n")
+    if digest is None:
+        log(f"File {file_path} does not exist.\n")
         return None
     headers = {
         "Content-Disposition": f"attachment; filename={file_name}",
         "Content-Type": "image/png"
     }
-    with open(file_path, "rb") as f:
-        file_data = f.read()
     response = requests.post(media_endpoint, headers=headers, data=file_data, auth=(username, password))
     if response.status_code not in [200, 201]:
-        print(f"Failed to upload {file_name}. Status code: {response.status_code}\n")
+        log(f"Failed to upload {file_name}. Status code: {response.status_code}\n")
         # print(response.text)
         return None
     media_json = response.json()
     media_url = media_json.get("source_url")
+    if media_url:
+        save_cached_media(base_url, digest, media_json.get("id"), media_url)
     # print(f"Uploaded {file_name} successfully. URL: {media_url}\n")
     return media_url
 
@@ -363,12 +807,12 @@ def fetch_page(base_url, slug, username, password):
     params = {"slug": slug}
     response = requests.get(pages_endpoint, params=params, auth=(username, password))
     if response.status_code != 200:
-        print("Failed to fetch page. Status code:", response.status_code)
+        log("Failed to fetch page. Status code:", response.status_code)
         # print(response.text)
         return None
     pages = response.json()
     if not pages:
-        print(f"No page found with slug '{slug}'.\n")
+        log(f"No page found with slug '{slug}'.\n")
         return None
     return pages[0]
 
@@ -377,19 +821,47 @@ def update_page_content(base_url, page_id, new_content, username, password):
     payload = {"content": new_content}
     response = requests.post(update_endpoint, json=payload, auth=(username, password))
     if response.status_code not in [200, 201]:
-        print("Failed to update page. Status code:", response.status_code)
+        log("Failed to update page. Status code:", response.status_code)
         # print(response.text)
         return False
     # print("Page updated successfully!\n")
     return True
 
+# ---------------------------
+# Published-container memory: unchanged prices and links skip the page write
+# ---------------------------
+LAST_UPDATED_REFRESH = 6 * 3600   # seconds; an unchanged page only gets a new "last updated" this often (None: never)
+
+def container_digest(site_data, best_price, lang):
+    # Everything the container shows except the timestamp and the logo URLs.
+    payload = json.dumps([site_data, best_price, lang], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def published_state(page_key):
+    # (digest, written_at) of the last container written to this page, or None.
+    conn = price_cache.connect()
+    row = conn.execute("SELECT digest, written_at FROM published_pages WHERE page=?", (page_key,)).fetchone()
+    conn.close()
+    return row
+
+def save_published_state(page_key, digest):
+    conn = price_cache.connect()
+    conn.execute("INSERT OR REPLACE INTO published_pages VALUES (?, ?, ?)", (page_key, digest, time.time()))
+    conn.commit()
+    conn.close()
+
+def refresh_last_updated(content, last_update, lang="eng"):
+    # Swap only the timestamp inside the existing container; None when there is none.
+    last_updated_text = "Son güncelleme:" if lang == "tr" else "Last updated:"
+    pattern = re.compile(r'(<div class="last-updated"[^>]*>)(.*?)(</div>)', re.DOTALL)
+    if not pattern.search(content):
+        return None
+    return pattern.sub(lambda m: f"{m.group(1)}\n    {last_updated_text} {last_update}\n  {m.group(3)}", content, count=1)
+
 # ---------------------------
 # Main update function (integrated with new env settings and language support)
 # ---------------------------
-def update_wordpress():
-    # Log the start time of the update.
-    print("Update started at:", datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "\n")
-    
+def read_env_settings():
     # Read settings from env.txt (row-by-row)
     # Expected env.txt lines:
     # 0: Base URL
@@ -406,21 +878,51 @@ def update_wordpress():
         with open("env.txt", "r") as f:
             lines = [line.strip() for line in f if line.strip()]
         if len(lines) < 10:
-            print("env.txt does not contain enough values.")
-            return
-        base_url = lines[0]
-        page_url = lines[1]
-        wp_username = lines[2]
-        wp_password = lines[3]
-        etstur_link_orig = lines[4]
-        trivago_link_orig = lines[5]
-        tatilbudur_link_orig = lines[6]
-        otelz_link = lines[7]
-        otelz_city = lines[8]
-        otelz_people = int(lines[9])
+            log("env.txt does not contain enough values.")
+            return None
+        return {
+            "base_url": lines[0],
+            "page_url": lines[1],
+            "username": lines[2],
+            "password": lines[3],
+            "etstur_link": lines[4],
+            "trivago_link": lines[5],
+            "tatilbudur_link": lines[6],
+            "otelz_link": lines[7],
+            "otelz_city": lines[8],
+            "otelz_people": int(lines[9])
+        }
     except Exception as e:
-        print("Error reading env.txt:", e)
-        return
+        log("Error reading env.txt:", e)
+        return None
+
+def update_wordpress(settings=None, lang=None, output=None):
+    # settings: a dict like read_env_settings() returns, optionally with "logos"
+    # (site -> file path); env.txt is read when none is given. lang defaults to
+    # the language chosen in the GUI. output receives this run's log lines,
+    # including those of its extraction threads; they are printed when None.
+    return run_with_output(output, publish_update, settings, lang)
+
+def publish_update(settings, lang):
+    # Log the start time of the update.
+    log("Update started at:", datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "\n")
+    
+    if settings is None:
+        settings = read_env_settings()
+        if settings is None:
+            return
+    if lang is None:
+        lang = current_language
+    base_url = settings["base_url"]
+    page_url = settings["page_url"]
+    wp_username = settings["username"]
+    wp_password = settings["password"]
+    etstur_link_orig = settings["etstur_link"]
+    trivago_link_orig = settings["trivago_link"]
+    tatilbudur_link_orig = settings["tatilbudur_link"]
+    otelz_link = settings["otelz_link"]
+    otelz_city = settings["otelz_city"]
+    otelz_people = int(settings["otelz_people"])
 
     if not base_url.endswith("/"):
         base_url += "/"
@@ -441,10 +943,26 @@ def update_wordpress():
     updated_tatilbudur_link = update_tatilbudur_link(tatilbudur_link_orig, tomorrow_str, day_after_str)
 
     # Extract prices from the updated links.
-    price_etstur = extract_price_with_retry(get_price_etstur, updated_etstur_link)
-    price_trivago = extract_price_with_retry(get_price_trivago, updated_trivago_link)
-    price_tatil = extract_price_with_retry(get_price_tatil, updated_tatilbudur_link)
-    price_otelz, otelz_final_url = extract_price_otelz_custom_with_retry(otelz_link, otelz_city, otelz_people)
+    # Cache keys: the OTA links carry their own guest counts; the Otelz search city
+    # and adults are not in its link, so they go into the key separately.
+    stay = (tomorrow.isoformat(), day_after.isoformat())
+    results = extract_all_prices({
+        "etstur": (extract_site_price, ("etstur", updated_etstur_link), None,
+                   (updated_etstur_link,) + stay + (0,)),
+        "trivago": (extract_site_price, ("trivago", updated_trivago_link), None,
+                    (updated_trivago_link,) + stay + (0,)),
+        "tatilbudur": (extract_site_price, ("tatilbudur", updated_tatilbudur_link), None,
+                       (updated_tatilbudur_link,) + stay + (0,)),
+        "otelz": (extract_site_price, ("otelz", otelz_link, otelz_city, otelz_people), (None, None),
+                  (otelz_link + ("&" if "?" in otelz_link else "?") + "city=" + otelz_city,) + stay + (otelz_people,))
+    })
+    price_etstur = results["etstur"]
+    price_trivago = results["trivago"]
+    price_tatil = results["tatilbudur"]
+    price_otelz, otelz_final_url = results["otelz"]
+    print_wait_stats()
+    print_path_stats()
+    price_cache.print_stats()
 
     # print("\nExtracted Prices and Links:")
     # print("Etstur Price:", price_etstur)
@@ -458,7 +976,7 @@ def update_wordpress():
         smallest = min(all_prices)
         best_price = smallest - 1
     else:
-        print("Could not determine final price due to missing data.")
+        log("Could not determine final price due to missing data.")
         return
 
     site_data = {
@@ -471,6 +989,17 @@ def update_wordpress():
     # Get the last update time to show in the HTML container.
     last_update = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
+    # Same prices and links as the last write: leave the page alone, apart from
+    # moving "last updated" forward every LAST_UPDATED_REFRESH seconds.
+    page_key = base_url + slug
+    digest = container_digest(site_data, best_price, lang)
+    published = published_state(page_key)
+    unchanged = published is not None and published[0] == digest
+    if unchanged and (LAST_UPDATED_REFRESH is None or time.time() - published[1] < LAST_UPDATED_REFRESH):
+        log("Prices and links unchanged; page not written.\n")
+        log("Update finished at:", datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "\n")
+        return
+    
     # --- WordPress update part ---
     # print("Fetching page with slug '{}'...".format(slug))
     page = fetch_page(base_url, slug, wp_username, wp_password)
@@ -479,10 +1008,21 @@ def update_wordpress():
     page_id = page.get("id")
     current_content = page["content"]["rendered"]
 
+    if unchanged:
+        refreshed = refresh_last_updated(current_content, last_update, lang=lang)
+        if refreshed is not None:
+            if update_page_content(base_url, page_id, refreshed, wp_username, wp_password):
+                save_published_state(page_key, digest)
+                log("Prices unchanged; only the last-updated time was refreshed.")
+            else:
+                log("Page update failed.")
+            log("Update finished at:", datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "\n")
+            return
+
     soup_new = BeautifulSoup(current_content, "html.parser")
     container_div = soup_new.find("div", class_="hotel-price")
 
-    logos = {
+    logos = settings.get("logos") or {
         "etstur": "etstur-logo.webp",
         "tatilbudur": "tatilbudur-logo.webp",
         "otelz": "otelz-logo.png",
@@ -505,20 +1045,19 @@ def update_wordpress():
                 if url:
                     logo_urls[key] = url
                 else:
-                    print(f"Error uploading {key} logo. Exiting.")
+                    log(f"Error uploading {key} logo. Exiting.")
                     return
     else:
-        print("Container not found. Uploading logos.")
+        log("Container not found. Uploading logos.")
         for key, file_path in logos.items():
             url = upload_media(file_path, wp_username, wp_password, base_url)
             if url:
                 logo_urls[key] = url
             else:
-                print(f"Error uploading {key} logo. Exiting.")
+                log(f"Error uploading {key} logo. Exiting.")
                 return
 
-    # Use the global current_language to choose container texts.
-    new_container_html = build_container_html(logo_urls, site_data, best_price, last_update, lang=current_language)
+    new_container_html = build_container_html(logo_urls, site_data, best_price, last_update, lang=lang)
 
     if container_div:
         # print("Updating existing container.")
@@ -538,11 +1077,12 @@ def update_wordpress():
     # print("Updating page content...")
     success = update_page_content(base_url, page_id, updated_content, wp_username, wp_password)
     if success:
-        print("Page updated successfully.")
+        save_published_state(page_key, digest)
+        log("Page updated successfully.")
     else:
-        print("Page update failed.")
+        log("Page update failed.")
 
-    print("Update finished at:", datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "\n")
+    log("Update finished at:", datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "\n")
 
 # ---------------------------
 # Tkinter GUI with Auto Update Timer
@@ -679,6 +1219,11 @@ def main_gui():
     stop_auto_button = tk.Button(root, text=LANG_TEXT["eng"]["stop_auto"], command=stop_auto)
     stop_auto_button.grid(row=8, column=1, pady=5)
     
+    def on_close():
+        driver_pool.close()
+        root.destroy()
+    root.protocol("WM_DELETE_WINDOW", on_close)
+    
     update_language()  # Initialize texts for selected language
     root.mainloop()
 
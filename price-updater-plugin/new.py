@@ -9,9 +9,12 @@ and WordPress update as before—now backed by SQLite.
 
 import os
 import re
+import queue
 import sqlite3
 import threading
 import time
+import heapq
+from concurrent.futures import ThreadPoolExecutor
 import requests
 from datetime import date, timedelta, datetime
 from tkinter import (
@@ -360,37 +363,42 @@ class MainFrame(Frame):
         Button(self, text="Run Update", command=self.on_run).grid(row=2, column=0, pady=5)
         Button(self, text="Start Auto", command=self.on_start).grid(row=2, column=1)
         Button(self, text="Stop Auto", command=self.on_stop).grid(row=2, column=2)
+        Button(self, text="Schedule All Accounts", command=self.on_schedule_all).grid(row=3, column=0, pady=5)
+        Button(self, text="Stop Schedule", command=self.on_stop_schedule).grid(row=3, column=1)
 
         self.log = ScrolledText(self, width=80, height=20)
-        self.log.grid(row=3, column=0, columnspan=3, pady=10)
+        self.log.grid(row=4, column=0, columnspan=3, pady=10)
+        # Update runs log from their own threads; the Tk thread shows the lines.
+        self.log_lines = queue.Queue()
+        self.show_log_lines()
 
         self.auto_job = None
+        self.scheduler = None
 
     def load_account(self, acct):
         """Called once after login—store account for update calls."""
         self.account = acct
         self.log.insert(END, f"Loaded account: {acct['domain']} / {acct['username']}\n")
 
+    def show_log_lines(self):
+        while True:
+            try:
+                self.log.insert(END, self.log_lines.get_nowait())
+            except queue.Empty:
+                break
+        self.log.see(END)
+        self.after(100, self.show_log_lines)
+
     def on_run(self):
         threading.Thread(target=self.run_update, daemon=True).start()
 
     def run_update(self):
-        # Redirect prints into the log
-        import sys
-        class TOut:
-            def write(self,s): self_log.insert(END, s)
-            def flush(self): pass
-        self_log = self.log
-        old = sys.stdout; sys.stdout = TOut()
-
         try:
             # Here, call your existing update_wordpress()
             # but pass self.account and master.lang_var.get() instead of env.txt
-            update_wordpress_with_account(self.account, self.master.lang_var.get())
+            update_wordpress_with_account(self.account, self.master.lang_var.get(), self.log_lines.put)
         except Exception as e:
-            print(f"[Error] {e}")
-        finally:
-            sys.stdout = old
+            self.log_lines.put(f"[Error] {e}\n")
 
     def on_start(self):
         interval = int(self.interval_entry.get())
@@ -405,8 +413,116 @@ class MainFrame(Frame):
             self.auto_job = None
             self.log.insert(END, "Auto‐update stopped.\n")
 
+    def on_schedule_all(self):
+        """Keep every saved account's page updated every interval minutes."""
+        if self.scheduler is not None:
+            added = self.scheduler.add_accounts()
+            self.log.insert(END, f"{added} new account(s) added to the schedule.\n")
+            return
+        self.scheduler = UpdateScheduler(int(self.interval_entry.get()), self.master.lang_var.get(),
+                                         output=self.log_lines.put)
+        self.scheduler.start()
+        self.log.insert(END, f"Scheduled {len(self.scheduler.scheduled)} account(s).\n")
+
+    def on_stop_schedule(self):
+        if self.scheduler is not None:
+            self.scheduler.stop()
+            self.scheduler = None
+            self.log.insert(END, "Schedule stopped; running updates will finish.\n")
+
+# ----------------------------------------------------------------
+# ---------- 4. SCHEDULER  ---------------------------------------
+# ----------------------------------------------------------------
+
+SCHEDULER_WORKERS = 2   # pages updated at the same time
+
+class UpdateScheduler:
+    """
+    Keeps every account's page on its own timer.
+
+    Next-run times sit in a heap; a dispatcher thread hands due pages to
+    a small worker pool, earliest first, and only when a worker is free.
+    A page is rescheduled when its run finishes, interval minutes after
+    it started, so one page never overlaps itself. Browsers and per-site
+    concurrency are limited further down, by main.driver_pool and
+    main.SITE_CONCURRENCY.
+
+    output receives the scheduler's and every run's log lines (they are
+    printed when it is None).
+    """
+    def __init__(self, interval_minutes, lang, workers=SCHEDULER_WORKERS, output=None):
+        self.interval = interval_minutes * 60
+        self.lang = lang
+        self.output = output
+        self.workers = workers
+        self.heap = []          # (next run as time.time(), account id)
+        self.scheduled = set()  # account ids in the heap or running
+        self.running = set()
+        self.cond = threading.Condition()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="page")
+        self.stopped = False
+
+    def start(self):
+        self.add_accounts()
+        threading.Thread(target=run_with_output, args=(self.output, self.dispatch), daemon=True).start()
+
+    def add_accounts(self):
+        """Schedule accounts not seen yet, spread evenly over one interval."""
+        with self.cond:
+            new_ids = [aid for aid, _, _ in list_accounts() if aid not in self.scheduled]
+            now = time.time()
+            for i, aid in enumerate(new_ids):
+                heapq.heappush(self.heap, (now + self.interval * i / len(new_ids), aid))
+                self.scheduled.add(aid)
+            self.cond.notify()
+        return len(new_ids)
+
+    def stop(self):
+        """Stop dispatching; pages already running finish on their own."""
+        with self.cond:
+            self.stopped = True
+            self.heap = []
+            self.cond.notify()
+        self.executor.shutdown(wait=False)
+
+    def dispatch(self):
+        with self.cond:
+            while not self.stopped:
+                if not self.heap or len(self.running) >= self.workers:
+                    self.cond.wait()
+                    continue
+                next_run, aid = self.heap[0]
+                delay = next_run - time.time()
+                if delay > 0:
+                    self.cond.wait(delay)
+                    continue
+                heapq.heappop(self.heap)
+                if delay < -60:
+                    log(f"[scheduler] account {aid} is {-delay:.0f}s late\n")
+                self.running.add(aid)
+                submit_in_context(self.executor, self.run, aid)
+
+    def run(self, aid):
+        started = time.time()
+        account = None
+        try:
+            account = get_account(aid)
+            if account is not None:
+                update_wordpress_with_account(account, self.lang, self.output)
+                log(f"[scheduler] {account['domain']} done in {time.time() - started:.0f}s\n")
+        except Exception as e:
+            log(f"[scheduler] account {aid} failed: {e}\n")
+        finally:
+            with self.cond:
+                self.running.discard(aid)
+                if account is None:
+                    self.scheduled.discard(aid)  # deleted meanwhile
+                elif not self.stopped:
+                    heapq.heappush(self.heap, (started + self.interval, aid))
+                self.cond.notify()
+
 # ----------------------------------------------------------------
-# ---------- 4. STUBBED HELPERS FOR DEMO PURPOSES  ---------------
+# ---------- 5. STUBBED HELPERS FOR DEMO PURPOSES  ---------------
 # ----------------------------------------------------------------
 
 def test_wp_login(domain, user, pwd, page_url):
@@ -424,27 +540,54 @@ def test_wp_login(domain, user, pwd, page_url):
         messagebox.showerror("WP Error", str(e))
         return False
 
-def update_wordpress_with_account(account, lang):
-    """
-    Adapt your original `update_wordpress()` logic
-    to accept `account` dict + `lang`.
-    - Read the links from account: account["etstur_link"], etc.
-    - Use account["domain"], account["username"], account["password"], account["page_url"]
-    - Pass `lang` into build_container_html or wherever you need it.
-    You can literally copy/paste your existing function body here,
-    replacing the `env.txt` read with the `account[...]` lookups.
-    """
-    # … your existing code goes here …
-    print("Running update for:", account["domain"], "lang=", lang)
-    # For demo:
-    time.sleep(2)
-    print("Update complete!\n")
+def account_settings(account):
+    """Map an accounts row onto the settings dict main.update_wordpress expects."""
+    logos = {site: account[f"logo_{site}"]
+             for site in ("etstur", "trivago", "tatilbudur", "otelz")
+             if account.get(f"logo_{site}")}
+    return {
+        "base_url": account["domain"],
+        "page_url": account["page_url"],
+        "username": account["username"],
+        "password": account["password"],
+        "etstur_link": account["etstur_link"],
+        "trivago_link": account["trivago_link"],
+        "tatilbudur_link": account["tatilbudur_link"],
+        "otelz_link": account["otelz_link"],
+        "otelz_city": account["otelz_city"],
+        "otelz_people": account["otelz_people"] or 1,
+        # the built-in logo files are used unless all four were chosen
+        "logos": logos if len(logos) == 4 else None,
+    }
+
+def update_wordpress_with_account(account, lang, output=None):
+    """Run main.update_wordpress for one account record instead of env.txt."""
+    run_with_output(output, log, "Running update for:", account["domain"], "lang=", lang)
+    update_wordpress(account_settings(account), lang, output)
 
 # ----------------------------------------------------------------
-# ---------- 5. ENTRY POINT  -------------------------------------
+# ---------- 6. ENTRY POINT  -------------------------------------
 # ----------------------------------------------------------------
 
 def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Hotel price updater")
+    parser.add_argument("--schedule", type=int, metavar="MINUTES",
+                        help="update every saved account every MINUTES without the GUI")
+    parser.add_argument("--lang", default="eng", choices=["eng", "tr"])
+    args = parser.parse_args()
+    if args.schedule:
+        init_db()
+        scheduler = UpdateScheduler(args.schedule, args.lang)
+        scheduler.start()
+        print(f"Scheduled {len(scheduler.scheduled)} account(s); Ctrl+C to stop.")
+        try:
+            while True:
+                time.sleep(60)
+                scheduler.add_accounts()
+        except KeyboardInterrupt:
+            scheduler.stop()
+        return
     app = PriceUpdaterApp()
     app.mainloop()
 